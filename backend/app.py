@@ -1,10 +1,14 @@
 from flask import Flask
 from flask_cors import CORS
 from config import Config
-from database.db import init_db
+from database.db import get_db, init_db
+from database.indexes import ensure_indexes
 from routes.auth_routes import auth_bp
 from routes.enroll_routes import enroll_bp
 from routes.biometric_routes import biometric_bp
+from services.verification_queue import start_verification_worker
+from services.integrity_scrubber import start_integrity_scrubber
+from models.identity_filter import start_identity_filter
 import os
 
 
@@ -15,10 +19,11 @@ def create_app():
     app.config.from_object(Config)
 
     # Enable CORS for React frontend
-    CORS(app)
+    CORS(app, expose_headers=["X-Next-Cursor"])
 
     # Initialize MongoDB
     init_db(app)
+    ensure_indexes(get_db())
 
     # Ensure uploads folder exists
     os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
@@ -28,11 +33,25 @@ def create_app():
     app.register_blueprint(enroll_bp, url_prefix="/api")
     app.register_blueprint(biometric_bp, url_prefix="/api")
 
-    return app
+    # Start background AI verification (one dispatcher per deployment via a
+    # MongoDB lease; or disable here and run python -m scripts.run_workers)
+    if app.config["VERIFICATION_WORKER_ENABLED"]:
+        start_verification_worker()
+
+    # Enrollment duplicate pre-check filter (built in the background)
+    if app.config["IDENTITY_FILTER_ENABLED"]:
+        start_identity_filter()
 
+    # Background integrity scrubber (leased, runs in one process at a time)
+    if app.config["SCRUBBER_ENABLED"]:
+        start_integrity_scrubber()
+
+    return app
 
-app = create_app()
 
+# Only build the app when run directly: the verification pool spawns
+# worker processes that re-import this module, and each would otherwise
+# start its own dispatcher, filters and scrubber. WSGI servers use wsgi:app.
 if __name__ == "__main__":
-    app.run(debug=True, port=5000)
+    create_app().run(debug=True, port=5000)
 
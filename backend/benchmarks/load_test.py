@@ -0,0 +1,584 @@
+"""
+End-to-end load test for the Flask app.
+
+Seeds N users, then drives a weighted mix of /api/login,
+/api/biometric-status, /api/upload-document/<doc_type> and /api/all-users
+from concurrent clients and reports per-endpoint throughput, p50/p95/p99
+latency and error rates, plus the server process's CPU and RSS.
+
+By default `run` starts the app from create_app() in a child process
+(threaded WSGI server) backed by an in-process MongoDB stand-in
+(mongomock, optional), so only the server is measured. Use --mongo-uri
+for a local mongod instead, or --url / --pid to load an already running
+deployment seeded with the `seed` command. The stand-in has no indexes
+and scans collections in Python, so use a real mongod for capacity
+numbers that involve /all-users.
+
+Run from the backend folder:
+
+    python -m benchmarks.load_test run --users 5000 --concurrency 16 --duration 30
+    python -m benchmarks.load_test run --mix status=8,list=1,upload=1 --output load.json
+    python -m benchmarks.load_test run --mongo-uri mongodb://localhost:27017/loadtest
+    python -m benchmarks.load_test seed --users 100000
+    python -m benchmarks.load_test run --url http://127.0.0.1:5000 --pid 4242
+"""
+import argparse
+import copy
+import http.client
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+from config import Config
+
+try:
+    import mongomock
+except ImportError:  # optional, only for the in-process stand-in
+    mongomock = None
+
+ADMIN_EMAIL = "loadtest-admin@example.com"
+DEFAULT_PASSWORD = "loadtest-password"
+DEFAULT_MIX = "login=1,status=6,upload=1,list=2"
+READY_MARKER = "LOADTEST READY"
+
+
+def user_email(index):
+    return f"loadtest-{index}@example.com"
+
+
+# ================= SEEDING =================
+
+def seed_users(db, count, password, chunk=1000):
+    """
+    Insert count users (plus an admin) with a spread of document states.
+    Existing load-test users are replaced. Every user shares one bcrypt
+    hash so seeding is not dominated by hashing.
+    """
+    from models.user_model import DOCUMENT_TYPES, user_schema
+    from password_utils import hash_password
+
+    db.users.delete_many({"email": {"$regex": "^loadtest-"}})
+
+    hashed = hash_password(password)
+    rng = random.Random(0)
+    now = datetime.utcnow()
+
+    def make_user(index, email, role="user"):
+        user = user_schema(
+            {
+                "fullName": f"LOAD TEST {index}",
+                "email": email,
+                "phone": "0000000000",
+                "aadhaar": f"9{index:011d}",
+                "password": hashed
+            },
+            None
+        )
+        user["role"] = role
+        user["created_at"] = now - timedelta(minutes=index)
+
+        for doc_type in DOCUMENT_TYPES[1:]:
+            state = rng.random()
+            document = user["documents"][doc_type]
+            document["uploaded"] = state < 0.6
+            document["verified"] = state < 0.3
+            document["rejected"] = 0.3 <= state < 0.35
+
+        return user
+
+    batch = [make_user(count, ADMIN_EMAIL, role="admin")]
+    for index in range(count):
+        batch.append(make_user(index, user_email(index)))
+
+        if len(batch) >= chunk:
+            db.users.insert_many(batch, ordered=False)
+            batch = []
+
+    if batch:
+        db.users.insert_many(batch, ordered=False)
+
+
+# ================= SERVER =================
+
+def use_standin_database():
+    """
+    Route database.db to mongomock. mongomock edits projection dicts in
+    place, which races when request threads share a module-level
+    projection, so finds get their own copy.
+    """
+    import database.db
+
+    find = mongomock.collection.Collection.find
+
+    def find_with_own_projection(self, filter=None, projection=None, *args, **kwargs):
+        if "projection" in kwargs:
+            kwargs["projection"] = copy.deepcopy(kwargs["projection"])
+        return find(self, filter, copy.deepcopy(projection), *args, **kwargs)
+
+    mongomock.collection.Collection.find = find_with_own_projection
+    database.db.MongoClient = mongomock.MongoClient
+
+
+def serve(args):
+    from werkzeug.serving import make_server
+
+    if args.mongo_uri:
+        Config.MONGO_URI = args.mongo_uri
+    else:
+        if mongomock is None:
+            raise SystemExit("mongomock is not installed: pip install mongomock, or pass --mongo-uri")
+        use_standin_database()
+        Config.MONGO_URI = "mongodb://localhost/loadtest"
+
+    # Keep files and background work out of the measurement
+    workdir = tempfile.mkdtemp(prefix="loadtest-")
+    Config.UPLOAD_FOLDER = os.path.join(workdir, "uploads")
+    Config.OCR_CACHE_PATH = os.path.join(workdir, "ocr_cache.sqlite3")
+    Config.VERIFICATION_WORKER_ENABLED = args.verification_worker
+    Config.SCRUBBER_ENABLED = False
+
+    from app import create_app
+    from database.db import get_db
+
+    app = create_app()
+
+    if args.users:
+        started = time.perf_counter()
+        seed_users(get_db(), args.users, args.password)
+        print(f"Seeded {args.users} users in {time.perf_counter() - started:.1f}s", flush=True)
+
+    # Per-request access logs would cost more than some of the endpoints
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    server = make_server(args.host, args.port, app, threaded=True)
+    print(f"{READY_MARKER} {server.server_port}", flush=True)
+    server.serve_forever()
+
+
+def start_server(args):
+    command = [
+        sys.executable, "-m", "benchmarks.load_test", "serve",
+        "--port", "0",
+        "--users", str(args.users),
+        "--password", args.password
+    ]
+    if args.mongo_uri:
+        command += ["--mongo-uri", args.mongo_uri]
+    if args.verification_worker:
+        command.append("--verification-worker")
+
+    process = subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+
+    for line in process.stdout:
+        print("[server]", line.rstrip())
+        if line.startswith(READY_MARKER):
+            port = int(line.split()[-1])
+            break
+    else:
+        raise SystemExit(f"Server exited with code {process.wait()}")
+
+    # Keep draining the server's output so it never blocks on a full pipe
+    threading.Thread(target=lambda: [None for _ in process.stdout], daemon=True).start()
+
+    return process, f"http://127.0.0.1:{port}"
+
+
+# ================= PROCESS MONITOR =================
+
+def _read_proc(pid):
+    """
+    (cpu seconds, rss bytes, peak rss bytes) from /proc, or None.
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/status") as f:
+            status = dict(line.split(":", 1) for line in f if ":" in line)
+    except OSError:
+        return None
+
+    ticks = os.sysconf("SC_CLK_TCK")
+    cpu = (int(fields[11]) + int(fields[12])) / ticks
+
+    def kb(name):
+        return int(status.get(name, "0 kB").split()[0]) * 1024
+
+    return cpu, kb("VmRSS"), kb("VmHWM")
+
+
+class ProcessMonitor:
+    """
+    Samples CPU time and RSS of the server processes (Linux /proc).
+    """
+
+    def __init__(self, pids, interval=0.5):
+        self.pids = pids
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self):
+        readings = [_read_proc(pid) for pid in self.pids]
+        if any(reading is None for reading in readings):
+            return None
+        return (
+            time.perf_counter(),
+            sum(r[0] for r in readings),
+            sum(r[1] for r in readings),
+            sum(r[2] for r in readings)
+        )
+
+    def _run(self):
+        while not self._stop.is_set():
+            sample = self._sample()
+            if sample:
+                self.samples.append(sample)
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def summary(self, start, end):
+        window = [s for s in self.samples if start <= s[0] <= end]
+        if len(window) < 2:
+            return None
+
+        (t0, cpu0, _, _), (t1, cpu1, rss, peak) = window[0], window[-1]
+        return {
+            "pids": self.pids,
+            "cpu_cores_used": round((cpu1 - cpu0) / (t1 - t0), 3),
+            "cpu_seconds": round(cpu1 - cpu0, 3),
+            "rss_mb": round(rss / 2 ** 20, 1),
+            "rss_mb_max": round(max(s[2] for s in window) / 2 ** 20, 1),
+            "peak_rss_mb": round(peak / 2 ** 20, 1)
+        }
+
+
+# ================= LOAD GENERATOR =================
+
+class Client:
+    """
+    One keep-alive HTTP connection (reopened when the server closes it).
+    """
+
+    def __init__(self, base_url, timeout):
+        parts = urlsplit(base_url)
+        connection = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self._conn = connection(parts.hostname, parts.port, timeout=timeout)
+
+    def request(self, method, path, body=None, headers=None):
+        try:
+            self._conn.request(method, path, body=body, headers=headers or {})
+            response = self._conn.getresponse()
+            data = response.read()
+            return response.status, data
+        except Exception:
+            self._conn.close()
+            raise
+
+
+def _multipart(field, filename, data):
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode() + data + f"\r\n--{boundary}--\r\n".encode()
+
+    return body, {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+
+
+def login(client, email, password):
+    status, data = client.request(
+        "POST", "/api/login",
+        body=json.dumps({"identifier": email, "password": password}),
+        headers={"Content-Type": "application/json"}
+    )
+    if status != 200:
+        raise SystemExit(f"Login failed for {email}: {status} {data[:200]!r}")
+    return json.loads(data)["token"]
+
+
+class Scenarios:
+    """
+    One request per scenario; each returns (endpoint label, status).
+    """
+
+    def __init__(self, args, sessions, admin_token):
+        self.args = args
+        self.sessions = sessions
+        self.admin_token = admin_token
+        self.document = os.urandom(args.upload_bytes)
+
+    def login(self, client, rng):
+        email = user_email(rng.randrange(self.args.users))
+        status, _ = client.request(
+            "POST", "/api/login",
+            body=json.dumps({"identifier": email, "password": self.args.password}),
+            headers={"Content-Type": "application/json"}
+        )
+        return "POST /api/login", status
+
+    def status(self, client, rng):
+        token = rng.choice(self.sessions)
+        status, _ = client.request(
+            "GET", "/api/biometric-status",
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        return "GET /api/biometric-status", status
+
+    def upload(self, client, rng):
+        token = rng.choice(self.sessions)
+        doc_type = rng.choice(["pan", "passport", "voter", "driving"])
+
+        # Unique content per request, so the store never deduplicates it
+        body, headers = _multipart("file", "scan.png", uuid.uuid4().bytes + self.document)
+        headers["Authorization"] = f"Bearer {token}"
+
+        status, _ = client.request("POST", f"/api/upload-document/{doc_type}", body=body, headers=headers)
+        return "POST /api/upload-document/<doc_type>", status
+
+    def list(self, client, rng):
+        query = f"limit={self.args.page_size}"
+        if rng.random() < 0.5:
+            query += f"&doc_type=pan&doc_status={rng.choice(['uploaded', 'verified', 'pending'])}"
+
+        status, _ = client.request(
+            "GET", f"/api/all-users?{query}",
+            headers={"Authorization": f"Bearer {self.admin_token}"}
+        )
+        return "GET /api/all-users", status
+
+
+def parse_mix(text):
+    mix = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in ("login", "status", "upload", "list"):
+            raise SystemExit(f"Unknown scenario in --mix: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def drive(base_url, scenarios, mix, args):
+    names, weights = list(mix), list(mix.values())
+    results = {}
+    lock = threading.Lock()
+    stop = threading.Event()
+    measure_from = time.perf_counter() + args.warmup
+
+    def worker(worker_id):
+        rng = random.Random(args.seed * 1000 + worker_id)
+        client = Client(base_url, args.timeout)
+        samples = []
+
+        while not stop.is_set():
+            scenario = getattr(scenarios, rng.choices(names, weights)[0])
+            started = time.perf_counter()
+            try:
+                endpoint, status = scenario(client, rng)
+            except Exception as e:
+                endpoint, status = scenario.__name__, type(e).__name__
+            finished = time.perf_counter()
+
+            if started >= measure_from:
+                samples.append((endpoint, status, finished - started))
+
+            if args.think_ms:
+                time.sleep(args.think_ms / 1000)
+
+        with lock:
+            for endpoint, status, latency in samples:
+                entry = results.setdefault(endpoint, {"latencies": [], "statuses": {}})
+                entry["latencies"].append(latency)
+                entry["statuses"][str(status)] = entry["statuses"].get(str(status), 0) + 1
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+
+    time.sleep(args.warmup + args.duration)
+    measure_to = time.perf_counter()
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return results, measure_from, measure_to
+
+
+def summarize(results, elapsed):
+    report = {}
+    totals = {"requests": 0, "errors": 0}
+
+    for endpoint, entry in sorted(results.items()):
+        latencies = sorted(entry["latencies"])
+        errors = sum(
+            n for status, n in entry["statuses"].items()
+            if not (status.isdigit() and int(status) < 400)
+        )
+        totals["requests"] += len(latencies)
+        totals["errors"] += errors
+
+        report[endpoint] = {
+            "requests": len(latencies),
+            "throughput_rps": round(len(latencies) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+            "error_rate": round(errors / len(latencies), 4),
+            "statuses": entry["statuses"]
+        }
+
+    totals["throughput_rps"] = round(totals["requests"] / elapsed, 2) if elapsed else 0
+    totals["error_rate"] = round(totals["errors"] / totals["requests"], 4) if totals["requests"] else 0
+    return report, totals
+
+
+def run(args):
+    mix = parse_mix(args.mix)
+    process = None
+
+    if args.url:
+        base_url, pids = args.url.rstrip("/"), args.pid
+    else:
+        process, base_url = start_server(args)
+        pids = [process.pid]
+
+    try:
+        setup_client = Client(base_url, args.timeout)
+        admin_token = login(setup_client, ADMIN_EMAIL, args.password)
+        sessions = [
+            login(setup_client, user_email(i), args.password)
+            for i in range(min(args.sessions, args.users))
+        ]
+        scenarios = Scenarios(args, sessions, admin_token)
+
+        monitor = ProcessMonitor(pids)
+        monitor.start()
+        client_cpu = time.process_time()
+
+        print(f"Driving {base_url}: mix {mix}, concurrency {args.concurrency}, "
+              f"{args.warmup}s warm-up + {args.duration}s")
+        results, start, end = drive(base_url, scenarios, mix, args)
+
+        client_cpu = time.process_time() - client_cpu
+        monitor.stop()
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    endpoints, totals = summarize(results, end - start)
+    server = monitor.summary(start, end) if pids else None
+
+    for endpoint, stats in endpoints.items():
+        print(
+            f"{endpoint:<38} {stats['throughput_rps']:8.1f} req/s  p50 {stats['p50_ms']:8.1f} ms  "
+            f"p95 {stats['p95_ms']:8.1f} ms  p99 {stats['p99_ms']:8.1f} ms  "
+            f"errors {stats['error_rate']:.1%}"
+        )
+    print(f"{'TOTAL':<38} {totals['throughput_rps']:8.1f} req/s  errors {totals['error_rate']:.1%}")
+    if server:
+        print(f"Server: {server['cpu_cores_used']} cores, RSS {server['rss_mb']} MB (max {server['rss_mb_max']} MB)")
+    print(f"Load generator CPU: {client_cpu / (end - start):.2f} cores")
+
+    if args.output:
+        report = {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "target": base_url,
+            "database": "external" if args.url else (args.mongo_uri or "mongomock"),
+            "options": {
+                "users": args.users,
+                "mix": mix,
+                "concurrency": args.concurrency,
+                "duration": args.duration,
+                "warmup": args.warmup,
+                "upload_bytes": args.upload_bytes,
+                "think_ms": args.think_ms,
+                "bcrypt_rounds": Config.BCRYPT_ROUNDS
+            },
+            "endpoints": endpoints,
+            "total": totals,
+            "server": server,
+            "load_generator_cpu_cores": round(client_cpu / (end - start), 3)
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print("Results written to", args.output)
+
+
+def seed(args):
+    from database.db import connect_db, get_db
+
+    connect_db(args.mongo_uri or Config.MONGO_URI)
+    started = time.perf_counter()
+    seed_users(get_db(), args.users, args.password)
+    print(f"Seeded {args.users} users in {time.perf_counter() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def common(sub):
+        sub.add_argument("--users", type=int, default=1000, help="users to seed")
+        sub.add_argument("--password", default=DEFAULT_PASSWORD)
+        sub.add_argument("--mongo-uri", help="use this MongoDB instead of the in-process stand-in")
+
+    run_parser = commands.add_parser("run", help="start (or target) the app and drive load")
+    common(run_parser)
+    run_parser.add_argument("--url", help="target a running deployment instead of starting one")
+    run_parser.add_argument("--pid", type=int, action="append", default=[], help="server pid to monitor with --url")
+    run_parser.add_argument("--mix", default=DEFAULT_MIX, help=f"scenario weights (default {DEFAULT_MIX})")
+    run_parser.add_argument("--concurrency", type=int, default=8)
+    run_parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    run_parser.add_argument("--warmup", type=float, default=5, help="unmeasured seconds first")
+    run_parser.add_argument("--sessions", type=int, default=8, help="logged-in users shared by the clients")
+    run_parser.add_argument("--upload-bytes", type=int, default=256 * 1024)
+    run_parser.add_argument("--page-size", type=int, default=50)
+    run_parser.add_argument("--think-ms", type=float, default=0, help="pause between a client's requests")
+    run_parser.add_argument("--timeout", type=float, default=60)
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--verification-worker", action="store_true", help="run AI verification during the test")
+    run_parser.add_argument("--output", help="write results JSON here")
+
+    serve_parser = commands.add_parser("serve", help="seed and serve the app (used by run)")
+    common(serve_parser)
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=5000)
+    serve_parser.add_argument("--verification-worker", action="store_true")
+
+    seed_parser = commands.add_parser("seed", help="seed load-test users into MONGO_URI")
+    common(seed_parser)
+
+    args = parser.parse_args()
+    {"run": run, "serve": serve, "seed": seed}[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
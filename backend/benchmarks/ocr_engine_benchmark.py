@@ -0,0 +1,99 @@
+"""
+Compare the pytesseract (subprocess per call) and tesserocr (warm
+in-process pool) OCR engines.
+
+Run from the backend folder:
+
+    python -m benchmarks.ocr_engine_benchmark [image ...] --iterations 50
+"""
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from config import Config
+from services.ocr_engine import create_ocr_engine, tesserocr
+
+
+def synthetic_card():
+    image = np.full((640, 1010), 255, dtype=np.uint8)
+    lines = [
+        "GOVERNMENT OF INDIA",
+        "Name: AYAN ANSARI",
+        "DOB: 01/01/1990",
+        "1234 5678 9012"
+    ]
+    for i, line in enumerate(lines):
+        cv2.putText(image, line, (40, 120 + i * 110),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.6, 0, 3)
+    return image
+
+
+def load_images(paths):
+    if not paths:
+        return [synthetic_card()]
+
+    images = []
+    for path in paths:
+        image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            raise SystemExit(f"Cannot read image: {path}")
+        images.append(image)
+    return images
+
+
+def run(engine, images, iterations, concurrency):
+    latencies = []
+
+    def ocr_once(i):
+        start = time.perf_counter()
+        engine.image_to_string(images[i % len(images)])
+        latencies.append(time.perf_counter() - start)
+
+    # Warm-up call so engine start-up is not counted
+    engine.image_to_string(images[0])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(ocr_once, range(iterations)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "engine": engine.name,
+        "iterations": iterations,
+        "throughput_per_s": iterations / elapsed,
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("images", nargs="*")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--concurrency", type=int, default=Config.OCR_PAGE_WORKERS)
+    args = parser.parse_args()
+
+    images = load_images(args.images)
+    engines = ["pytesseract"]
+    if tesserocr is not None:
+        engines.append("tesserocr")
+    else:
+        print("tesserocr not installed, benchmarking pytesseract only")
+
+    for name in engines:
+        result = run(create_ocr_engine(name), images, args.iterations, args.concurrency)
+        print(
+            f"{result['engine']:>12}: {result['throughput_per_s']:.1f} img/s, "
+            f"mean {result['mean_ms']:.1f} ms, p50 {result['p50_ms']:.1f} ms, "
+            f"p95 {result['p95_ms']:.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Synthetic ID documents for benchmarks.
+
+Everything is generated from a seed, so two runs with the same arguments
+produce byte-identical images and PDFs. Cards are rendered with OpenCV
+text on a light background (with optional skew and scanner noise);
+scanned PDFs embed those renders as page images, digital PDFs carry a
+real text layer.
+"""
+import io
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from services.ocr_profiles import mrz_check_digit
+
+# Card sizes in pixels at 300 dpi (ID-1 card, passport data page)
+CARD_SIZE = (1012, 638)
+PASSPORT_SIZE = (1476, 1039)
+
+DOC_TYPES = ("aadhaar", "pan", "passport")
+
+
+def identity(seed=0):
+    """
+    A user record as stored in MongoDB, with the ID numbers printed on
+    the matching synthetic documents.
+    """
+    rng = np.random.default_rng(seed)
+    first = ["AYAN", "PRIYA", "RAHUL", "SNEHA", "ARJUN", "MEERA"]
+    last = ["ANSARI", "SHARMA", "VERMA", "IYER", "KHAN", "NAIR"]
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+    return {
+        "full_name": f"{rng.choice(first)} {rng.choice(last)}",
+        "aadhaar": "".join(str(d) for d in rng.integers(0, 10, 12)),
+        "pan": "".join(rng.choice(list(letters), 5)) + "".join(str(d) for d in rng.integers(0, 10, 4)) + rng.choice(list(letters)),
+        "passport": rng.choice(list(letters)) + "".join(str(d) for d in rng.integers(0, 10, 7)),
+        "dob": "01/01/1990"
+    }
+
+
+def _mrz(person):
+    surname, _, given = person["full_name"].partition(" ")[::-1]
+    number = person["passport"].ljust(9, "<")
+    birth, expiry = "900101", "350101"
+
+    first = f"P<IND{surname}<<{given}".replace(" ", "<").ljust(44, "<")[:44]
+    second = (
+        number + mrz_check_digit(number) + "IND"
+        + birth + mrz_check_digit(birth) + "M"
+        + expiry + mrz_check_digit(expiry)
+    ).ljust(42, "<") + "0"
+    composite = second[0:10] + second[13:20] + second[21:43]
+
+    return [first, second[:43] + mrz_check_digit(composite)]
+
+
+def card_lines(doc_type, person):
+    if doc_type == "aadhaar":
+        number = person["aadhaar"]
+        return [
+            "GOVERNMENT OF INDIA",
+            person["full_name"],
+            f"DOB: {person['dob']}",
+            f"{number[:4]} {number[4:8]} {number[8:]}",
+            "Unique Identification Authority of India"
+        ]
+    if doc_type == "pan":
+        return [
+            "INCOME TAX DEPARTMENT",
+            person["full_name"],
+            person["dob"],
+            "Permanent Account Number",
+            person["pan"]
+        ]
+    if doc_type == "passport":
+        return [
+            "REPUBLIC OF INDIA",
+            "PASSPORT",
+            person["full_name"],
+            person["passport"],
+            *_mrz(person)
+        ]
+    raise ValueError(f"Unknown document type: {doc_type}")
+
+
+def render_card(doc_type, person, scale=1.0, skew=0.0, noise=0.0, seed=0):
+    """
+    Grayscale card image. scale resizes from 300 dpi, skew is in
+    degrees, noise is the std-dev of added Gaussian scanner noise.
+    """
+    width, height = PASSPORT_SIZE if doc_type == "passport" else CARD_SIZE
+    image = np.full((height, width), 235, dtype=np.uint8)
+    lines = card_lines(doc_type, person)
+
+    # Photo box on the left, text to the right (MRZ full width at the bottom)
+    cv2.rectangle(image, (30, 120), (230, 380), 90, -1)
+    for i, line in enumerate(lines):
+        mrz = line.startswith("P<") or (doc_type == "passport" and i == len(lines) - 1)
+        x = 30 if mrz else 260
+        y = height - 110 + (i - len(lines) + 2) * 55 if mrz else 80 + i * 90
+        font_scale = 1.05 if mrz else 1.3
+        cv2.putText(image, line, (x, y), cv2.FONT_HERSHEY_SIMPLEX, font_scale, 20, 2, cv2.LINE_AA)
+
+    if skew:
+        matrix = cv2.getRotationMatrix2D((width / 2, height / 2), skew, 1.0)
+        image = cv2.warpAffine(image, matrix, (width, height), borderValue=255)
+
+    if noise:
+        rng = np.random.default_rng(seed)
+        image = np.clip(image + rng.normal(0, noise, image.shape), 0, 255).astype(np.uint8)
+
+    if scale != 1.0:
+        image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    return image
+
+
+def encode_image(image, ext="png"):
+    ok, encoded = cv2.imencode(f".{ext}", image)
+    if not ok:
+        raise ValueError(f"Cannot encode .{ext}")
+    return encoded.tobytes()
+
+
+def scanned_pdf(pages, dpi=300):
+    """
+    Image-only PDF (as a scanner would produce) from grayscale pages.
+    """
+    images = [Image.fromarray(page) for page in pages]
+    out = io.BytesIO()
+    images[0].save(out, "PDF", save_all=True, append_images=images[1:], resolution=dpi)
+    return out.getvalue()
+
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def digital_pdf(pages_of_lines):
+    """
+    Minimal PDF with a Helvetica text layer, one page per list of lines.
+    """
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+
+    for lines in pages_of_lines:
+        stream = "BT /F1 14 Tf 50 780 Td 18 TL " + " ".join(
+            f"({_pdf_escape(line)}) '" for line in lines
+        ) + " ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream".encode())
+        content_id = len(objects)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>".encode()
+        )
+        page_ids.append(len(objects))
+
+    kids = " ".join(f"{n} 0 R" for n in page_ids)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode()
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n".encode() + body + b"\nendobj\n")
+
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+
+    return out.getvalue()
+
+
+def document(doc_type, kind, person, pages=1, dpi=300, seed=0):
+    """
+    (bytes, extension) for one synthetic upload. kind is "image",
+    "scanned_pdf" or "digital_pdf"; extra PDF pages repeat the card with
+    different noise, as multi-page scans of the same document do.
+    """
+    if kind == "image":
+        return encode_image(render_card(doc_type, person, noise=4, seed=seed)), ".png"
+
+    if kind == "scanned_pdf":
+        scale = dpi / 300
+        renders = [
+            render_card(doc_type, person, scale=scale, skew=1.5, noise=6, seed=seed + page)
+            for page in range(pages)
+        ]
+        return scanned_pdf(renders, dpi), ".pdf"
+
+    if kind == "digital_pdf":
+        return digital_pdf([card_lines(doc_type, person)] * pages), ".pdf"
+
+    raise ValueError(f"Unknown document kind: {kind}")
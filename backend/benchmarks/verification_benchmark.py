@@ -0,0 +1,349 @@
+"""
+Micro- and macro-benchmarks for the verification hot paths.
+
+Covers OCR (images, scanned and digital PDFs), document matching and
+scoring, chunked encryption, PQC / Merkle hashing and bcrypt, all on
+synthetic documents generated from a fixed seed. Results are written as
+JSON and can be compared against a stored baseline; the run exits 1 if
+any case regresses.
+
+Run from the backend folder:
+
+    python -m benchmarks.verification_benchmark --output results.json
+    python -m benchmarks.verification_benchmark --baseline results.json
+    python -m benchmarks.verification_benchmark --only crypto. --quick
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pytesseract
+
+from benchmarks import synthetic_documents as docs
+from config import Config
+from password_utils import hash_password, verify_password
+from services.ai_verification_service import AIVerificationService
+from services.document_matcher import DocumentMatcher
+from services.encryption_service import EncryptionService
+from services.pqc_service import MerkleBuilder, PQCService
+
+CASES = []
+
+
+def case(name, group, unit="op", repeat=20):
+    """
+    Register a benchmark. The decorated function takes the run options
+    and returns (fn, units_per_call): fn() is timed repeat times.
+    """
+    def register(setup):
+        CASES.append({"name": name, "group": group, "unit": unit, "repeat": repeat, "setup": setup})
+        return setup
+    return register
+
+
+class Skip(Exception):
+    pass
+
+
+def tesseract_available():
+    try:
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception:
+        return False
+
+
+def _require_ocr():
+    if not tesseract_available():
+        raise Skip("tesseract not installed")
+
+
+# ================= OCR =================
+
+def _ocr_case(doc_type, kind, pages=1, dpi=300):
+    def setup(options):
+        _require_ocr()
+        data, ext = docs.document(doc_type, kind, docs.identity(options.seed), pages, dpi, options.seed)
+
+        # _run_ocr skips the OCR result cache
+        return lambda: AIVerificationService._run_ocr(data, ext, None), pages
+
+    return setup
+
+
+for _doc_type in docs.DOC_TYPES:
+    case(f"ocr.image.{_doc_type}", "ocr", unit="page", repeat=5)(_ocr_case(_doc_type, "image"))
+
+for _pages, _dpi in ((1, 150), (1, 300), (3, 300)):
+    case(f"ocr.scanned_pdf.{_pages}p_{_dpi}dpi", "ocr", unit="page", repeat=3)(
+        _ocr_case("aadhaar", "scanned_pdf", _pages, _dpi)
+    )
+
+
+def _text_layer_case(pages):
+    # Digital PDFs are read from their text layer, no tesseract needed
+    def setup(options):
+        data, _ = docs.document("aadhaar", "digital_pdf", docs.identity(options.seed), pages)
+        return lambda: AIVerificationService._read_text_layer(data, None), pages
+
+    return setup
+
+
+for _pages in (1, 10):
+    case(f"pdf.text_layer.{_pages}p", "ocr", unit="page")(_text_layer_case(_pages))
+
+
+@case("verify.profile.aadhaar", "ocr", repeat=5)
+def _verify_profile(options):
+    _require_ocr()
+    person = docs.identity(options.seed)
+    data, ext = docs.document("aadhaar", "image", person, seed=options.seed)
+    return lambda: AIVerificationService.verify_with_profile(data, ext, "aadhaar", person), 1
+
+
+# ================= MATCHING =================
+
+def _document_text(person):
+    return "\n".join(
+        line for doc_type in docs.DOC_TYPES for line in docs.card_lines(doc_type, person)
+    )
+
+
+@case("match.scan", "matching", repeat=200)
+def _match_scan(options):
+    text = _document_text(docs.identity(options.seed))
+    return lambda: DocumentMatcher.scan(text), 1
+
+
+@case("match.score.all_types", "matching", repeat=200)
+def _match_score(options):
+    person = docs.identity(options.seed)
+    text = _document_text(person)
+
+    def score():
+        for doc_type in docs.DOC_TYPES:
+            AIVerificationService.score_text(text, doc_type, person)
+
+    return score, len(docs.DOC_TYPES)
+
+
+# ================= ENCRYPTION AND HASHING =================
+
+def _payload(size, seed):
+    return np.random.default_rng(seed).bytes(size)
+
+
+for _size in (64 * 1024, 1024 * 1024, 16 * 1024 * 1024):
+    _label = f"{_size // 1024}k" if _size < 1024 * 1024 else f"{_size // (1024 * 1024)}m"
+
+    @case(f"crypto.encrypt_stream.{_label}", "crypto", unit="MB", repeat=10)
+    def _encrypt(options, size=_size):
+        data = _payload(size, options.seed)
+        return lambda: EncryptionService.encrypt_stream(io.BytesIO(data), io.BytesIO()), size / 1e6
+
+    @case(f"crypto.decrypt_stream.{_label}", "crypto", unit="MB", repeat=10)
+    def _decrypt(options, size=_size):
+        token = io.BytesIO()
+        EncryptionService.encrypt_stream(io.BytesIO(_payload(size, options.seed)), token)
+        token = token.getvalue()
+
+        def decrypt():
+            for _ in EncryptionService.decrypt_stream(io.BytesIO(token)):
+                pass
+
+        return decrypt, size / 1e6
+
+    @case(f"hash.pqc_marker.{_label}", "hashing", unit="MB", repeat=10)
+    def _marker(options, size=_size):
+        data = _payload(size, options.seed)
+        return lambda: PQCService.create_pqc_marker(data), size / 1e6
+
+    @case(f"hash.merkle.{_label}", "hashing", unit="MB", repeat=10)
+    def _merkle(options, size=_size):
+        data = _payload(size, options.seed)
+        leaf = Config.INTEGRITY_CHUNK_SIZE
+
+        def build():
+            builder = MerkleBuilder(leaf, leaf)
+            for start in range(0, len(data), 64 * 1024):
+                builder.update(data[start:start + 64 * 1024])
+            builder.finalize()
+
+        return build, size / 1e6
+
+
+# ================= PASSWORDS =================
+
+@case("bcrypt.hash", "bcrypt", repeat=5)
+def _bcrypt_hash(options):
+    return lambda: hash_password("correct horse battery staple"), 1
+
+
+@case("bcrypt.verify", "bcrypt", repeat=5)
+def _bcrypt_verify(options):
+    hashed = hash_password("correct horse battery staple")
+    return lambda: verify_password("correct horse battery staple", hashed), 1
+
+
+@case("bcrypt.verify.concurrent", "bcrypt", unit="login", repeat=3)
+def _bcrypt_concurrent(options):
+    hashed = hash_password("correct horse battery staple")
+    logins = Config.BCRYPT_WORKERS * 4
+
+    def burst():
+        with ThreadPoolExecutor(max_workers=Config.BCRYPT_WORKERS) as pool:
+            list(pool.map(lambda _: verify_password("correct horse battery staple", hashed), range(logins)))
+
+    return burst, logins
+
+
+# ================= RUNNER =================
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def run_case(spec, options):
+    fn, units = spec["setup"](options)
+    repeat = max(2, spec["repeat"] // 4) if options.quick else spec["repeat"]
+
+    # Warm-up (lazy imports, thread pools, caches keyed on the key version)
+    fn()
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+
+    samples.sort()
+    total = sum(samples)
+
+    return {
+        "group": spec["group"],
+        "unit": spec["unit"],
+        "repeat": repeat,
+        "mean_ms": statistics.mean(samples) * 1000,
+        "p50_ms": percentile(samples, 0.50) * 1000,
+        "p95_ms": percentile(samples, 0.95) * 1000,
+        "p99_ms": percentile(samples, 0.99) * 1000,
+        "throughput_per_s": repeat * units / total if total else None
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        commit = None
+
+    return {
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "bcrypt_rounds": Config.BCRYPT_ROUNDS,
+        "bcrypt_workers": Config.BCRYPT_WORKERS,
+        "ocr_engine": Config.OCR_ENGINE,
+        "ocr_page_workers": Config.OCR_PAGE_WORKERS,
+        "encryption_segment_size": Config.ENCRYPTION_SEGMENT_SIZE
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    Cases whose p50 got slower than baseline by more than tolerance.
+    """
+    regressions = []
+
+    for name, result in results.items():
+        before = baseline.get("results", {}).get(name)
+        if not before or "p50_ms" not in result or "p50_ms" not in before:
+            continue
+
+        change = result["p50_ms"] / before["p50_ms"] - 1 if before["p50_ms"] else 0
+        result["p50_change"] = round(change, 4)
+
+        if change > tolerance:
+            regressions.append((name, before["p50_ms"], result["p50_ms"], change))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--only", action="append", default=[], help="run cases whose name starts with this prefix")
+    parser.add_argument("--quick", action="store_true", help="fewer repetitions")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="compare against a previous results JSON")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed p50 slowdown (0.15 = 15%%)")
+    parser.add_argument("--list", action="store_true", help="list cases and exit")
+    options = parser.parse_args()
+
+    selected = [
+        spec for spec in CASES
+        if not options.only or any(spec["name"].startswith(prefix) for prefix in options.only)
+    ]
+
+    if options.list:
+        for spec in selected:
+            print(spec["name"])
+        return
+
+    results = {}
+    for spec in selected:
+        try:
+            result = run_case(spec, options)
+        except Skip as e:
+            results[spec["name"]] = {"group": spec["group"], "skipped": str(e)}
+            print(f"{spec['name']:<34} skipped ({e})")
+            continue
+
+        results[spec["name"]] = result
+        print(
+            f"{spec['name']:<34} p50 {result['p50_ms']:9.2f} ms  p95 {result['p95_ms']:9.2f} ms  "
+            f"p99 {result['p99_ms']:9.2f} ms  {result['throughput_per_s']:10.1f} {spec['unit']}/s"
+        )
+
+    report = {"environment": environment(), "options": {"quick": options.quick, "seed": options.seed}, "results": results}
+
+    regressions = []
+    if options.baseline:
+        with open(options.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, options.tolerance)
+        report["baseline"] = {"path": options.baseline, "environment": baseline.get("environment")}
+
+        if baseline.get("options") != report["options"]:
+            print("Warning: baseline was recorded with different options:", baseline.get("options"))
+
+        for name, before, after, change in regressions:
+            print(f"REGRESSION {name}: p50 {before:.2f} -> {after:.2f} ms ({change:+.0%})")
+
+    if options.output:
+        with open(options.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print("Results written to", options.output)
+
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,9 +13,107 @@ class Config:
     # Upload folder for biometric files
     UPLOAD_FOLDER = os.path.join(os.getcwd(), "uploads")
 
+    # Local working data that is not a document (OCR cache)
+    DATA_FOLDER = os.environ.get("DATA_FOLDER") or os.path.join(os.getcwd(), "data")
+
     # Allowed file types
     ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "pdf"}
 
     # JWT Config
     JWT_EXPIRATION_MINUTES = 60
 
+
+    # Background AI verification queue
+    VERIFICATION_WORKER_ENABLED = os.environ.get("VERIFICATION_WORKER_ENABLED", "1") == "1"
+    VERIFICATION_WORKERS = int(os.environ.get("VERIFICATION_WORKERS") or 2)
+    VERIFICATION_POLL_SECONDS = 1.0
+    # Singleton workers (dispatcher, scrubber) hold a renewed MongoDB lease
+    WORKER_LEASE_SECONDS = 30
+    VERIFICATION_JOB_TIMEOUT_SECONDS = 300
+    VERIFICATION_MAX_ATTEMPTS = 3
+
+    # OCR result cache (bump OCR_CONFIG_VERSION when OCR settings change).
+    # The text holds ID numbers, so entries are encrypted like documents
+    # and expire after OCR_CACHE_TTL_SECONDS.
+    OCR_CONFIG_VERSION = "2"
+    OCR_CACHE_PATH = os.environ.get("OCR_CACHE_PATH") or os.path.join(DATA_FOLDER, "ocr_cache.sqlite3")
+    OCR_CACHE_MAX_BYTES = 64 * 1024 * 1024
+    OCR_CACHE_TTL_SECONDS = 7 * 24 * 3600
+
+    # OCR engine and scanned PDF handling. Each verification process gets
+    # an equal share of the cores for its page threads / tesseract engines.
+    OCR_PAGE_WORKERS = int(
+        os.environ.get("OCR_PAGE_WORKERS")
+        or max(1, (os.cpu_count() or 2) // VERIFICATION_WORKERS)
+    )
+    OCR_MAX_PAGES = 20
+    PDF_TEXT_MAX_PAGES = 10
+    OCR_ENGINE = os.environ.get("OCR_ENGINE") or "auto"
+    OCR_LANG = "eng"
+
+    # Image preprocessing before OCR (stages run in this order)
+    OCR_PREPROCESS_STAGES = ["crop", "normalize", "deskew", "binarize"]
+    OCR_TARGET_DPI = 300
+
+    # Chunked document encryption (plaintext bytes per AES-GCM segment)
+    ENCRYPTION_SEGMENT_SIZE = 64 * 1024
+
+    # Streaming uploads
+    MAX_UPLOAD_BYTES = 25 * 1024 * 1024
+    MAX_UPLOAD_PARTS = 10
+
+    # Chunk-level integrity (Merkle) and background scrubber
+    INTEGRITY_CHUNK_SIZE = 64 * 1024
+    INTEGRITY_HASH_WORKERS = 4
+    SCRUBBER_ENABLED = os.environ.get("SCRUBBER_ENABLED", "1") == "1"
+    SCRUB_BYTES_PER_SECOND = 8 * 1024 * 1024
+    SCRUB_INTERVAL_SECONDS = 24 * 60 * 60
+    SCRUB_POLL_SECONDS = 60
+
+    # Content-addressed document store (objects/<ab>/<cd>/...)
+    STORAGE_ADDRESS_KEY = os.environ.get("STORAGE_ADDRESS_KEY") or SECRET_KEY
+    STORAGE_FANOUT_LEVELS = 2
+
+    # Keyring: versioned master keys that wrap per-document data keys,
+    # as "1:<urlsafe base64 32 bytes>,2:...". Version 0 is derived from
+    # SECRET_KEY; new documents use the newest version unless overridden.
+    ENCRYPTION_MASTER_KEYS = os.environ.get("ENCRYPTION_MASTER_KEYS") or ""
+    ENCRYPTION_ACTIVE_KEY_VERSION = os.environ.get("ENCRYPTION_ACTIVE_KEY_VERSION")
+
+    # Key rotation job (python -m scripts.rotate_keys)
+    KEY_ROTATION_WORKERS = int(os.environ.get("KEY_ROTATION_WORKERS") or 4)
+    KEY_ROTATION_BYTES_PER_SECOND = 32 * 1024 * 1024
+    KEY_ROTATION_LEASE_SECONDS = 300
+    # Old files outlive the switch-over by this long, so uploads that
+    # deduplicated onto them have finished recording their path
+    KEY_ROTATION_RETIRE_SECONDS = 120
+
+    # Admin user listing (/all-users)
+    USER_LIST_PAGE_SIZE = 100
+    USER_LIST_MAX_PAGE_SIZE = 500
+
+    # Per-process user document cache (models/user_cache.py)
+    USER_CACHE_TTL_SECONDS = 15
+    USER_CACHE_MAX_ENTRIES = 10000
+
+    # Password hashing (bcrypt cost; existing hashes are upgraded on login)
+    BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS") or 12)
+    BCRYPT_WORKERS = int(os.environ.get("BCRYPT_WORKERS") or max(1, (os.cpu_count() or 2) // 2))
+    BCRYPT_MAX_QUEUE = 32
+
+    # Verified JWT cache and revocation list sync
+    TOKEN_CACHE_MAX_ENTRIES = 10000
+    TOKEN_REVOCATION_SYNC_SECONDS = 5
+
+    # Bulk admin review (/admin/bulk-review)
+    BULK_REVIEW_MAX_OPERATIONS = 1000
+
+    # Bulk enrollment import (python -m scripts.bulk_import)
+    BULK_IMPORT_BATCH_SIZE = 500
+    BULK_IMPORT_INSERT_CHUNK = 100
+
+    # Enrollment duplicate pre-check (Bloom filter over aadhaar / email)
+    IDENTITY_FILTER_ENABLED = os.environ.get("IDENTITY_FILTER_ENABLED", "1") == "1"
+    IDENTITY_FILTER_MIN_CAPACITY = 100000
+    IDENTITY_FILTER_ERROR_RATE = 0.01
+    IDENTITY_FILTER_REBUILD_SECONDS = 15 * 60
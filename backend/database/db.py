@@ -4,12 +4,16 @@ from flask import current_app
 client = None
 db = None
 
-def init_db(app):
+def connect_db(mongo_uri):
     global client, db
 
-    client = MongoClient(app.config["MONGO_URI"])
+    client = MongoClient(mongo_uri)
     db = client.get_default_database()
 
+
+def init_db(app):
+    connect_db(app.config["MONGO_URI"])
+
     print("MongoDB Connected Successfully")
 
 def get_db():
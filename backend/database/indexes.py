@@ -0,0 +1,73 @@
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from models.user_model import DOCUMENT_TYPES
+
+# Every index the app relies on, per collection. ensure_indexes() runs at
+# startup; create_indexes is a no-op for indexes that already exist.
+# scripts/check_query_plans.py fails if a models-layer query stops using them.
+
+INDEXES = {
+    "users": [
+        IndexModel(
+            [("aadhaar", ASCENDING)],
+            name="aadhaar_unique",
+            unique=True,
+            partialFilterExpression={"aadhaar": {"$type": "string"}}
+        ),
+        IndexModel(
+            [("email", ASCENDING)],
+            name="email_unique",
+            unique=True,
+            partialFilterExpression={"email": {"$type": "string"}}
+        ),
+        IndexModel([("role", ASCENDING), ("_id", DESCENDING)], name="role_id"),
+        IndexModel([("created_at", DESCENDING)], name="created_at"),
+        *[
+            # Admin review queues: only uploaded documents are indexed
+            IndexModel(
+                [(f"documents.{t}.verified", ASCENDING), (f"documents.{t}.rejected", ASCENDING)],
+                name=f"{t}_review_status",
+                partialFilterExpression={f"documents.{t}.uploaded": True}
+            )
+            for t in DOCUMENT_TYPES
+        ],
+        *[
+            IndexModel(
+                [(f"documents.{t}.{field}", ASCENDING)],
+                name=f"{t}_{field}",
+                partialFilterExpression={f"documents.{t}.{field}": {"$type": "string"}}
+            )
+            for t in DOCUMENT_TYPES
+            for field in ("path", "object_id")
+        ]
+    ],
+    "verification_jobs": [
+        IndexModel([("status", ASCENDING), ("created_at", ASCENDING)], name="status_created_at"),
+        IndexModel([("path", ASCENDING)], name="path")
+    ],
+    "objects": [
+        IndexModel([("format", ASCENDING), ("key_version", ASCENDING)], name="format_key_version")
+    ],
+    "retired_files": [
+        IndexModel([("retired_at", ASCENDING)], name="retired_at")
+    ],
+    "integrity_manifests": [
+        IndexModel([("path", ASCENDING)], name="path")
+    ],
+    "revoked_tokens": [
+        # Entries are only needed until the token would have expired
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+        IndexModel([("revoked_at", ASCENDING)], name="revoked_at")
+    ]
+}
+
+
+def ensure_indexes(db):
+    for collection, indexes in INDEXES.items():
+        try:
+            db[collection].create_indexes(indexes)
+        except OperationFailure as e:
+            # e.g. existing duplicate emails block the unique index;
+            # keep serving and report it
+            print(f"Index creation failed for {collection}:", str(e))
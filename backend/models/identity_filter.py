@@ -0,0 +1,139 @@
+import threading
+import time
+
+from config import Config
+from database.db import get_db
+from services.bloom_filter import BloomFilter
+
+# In-memory Bloom filter over enrolled aadhaar numbers and emails, so the
+# enrollment duplicate check can skip MongoDB for identities that are
+# certainly new. Built at startup from a streamed projection, updated by
+# create_user and rebuilt every IDENTITY_FILTER_REBUILD_SECONDS (which
+# also picks up users created by other processes). Users enrolled through
+# another process since the last rebuild read as new, so a "new" answer is
+# only safe while the unique indexes reject the insert: each build checks
+# they exist, and until one finishes with them in place every lookup goes
+# to the database.
+
+# Names as defined in database/indexes.py
+UNIQUE_INDEXES = ("aadhaar_unique", "email_unique")
+
+_filter = None
+_pending = None
+_refresher = None
+_lock = threading.Lock()
+_stats = {"negatives": 0, "possible_positives": 0, "unavailable": 0, "rebuilds": 0, "indexes_confirmed": False}
+
+
+def _keys(aadhaar=None, email=None):
+    keys = []
+    if aadhaar:
+        keys.append(f"aadhaar:{aadhaar}")
+    if email:
+        keys.append(f"email:{email}")
+    return keys
+
+
+def identity_may_exist(aadhaar=None, email=None):
+    """
+    False only if no enrolled user has this aadhaar or email.
+    """
+    with _lock:
+        if _filter is None:
+            _stats["unavailable"] += 1
+            return True
+
+        if any(_filter.might_contain(key) for key in _keys(aadhaar, email)):
+            _stats["possible_positives"] += 1
+            return True
+
+        _stats["negatives"] += 1
+        return False
+
+
+def add_identity(aadhaar=None, email=None):
+    keys = _keys(aadhaar, email)
+
+    with _lock:
+        if _filter is not None:
+            for key in keys:
+                _filter.add(key)
+        # Also replay into a rebuild that is in progress
+        if _pending is not None:
+            _pending.extend(keys)
+
+
+def unique_indexes_confirmed(db):
+    indexes = db.users.index_information()
+    return all(indexes.get(name, {}).get("unique") for name in UNIQUE_INDEXES)
+
+
+def build_identity_filter():
+    global _filter, _pending
+
+    db = get_db()
+    confirmed = unique_indexes_confirmed(db)
+
+    with _lock:
+        _stats["indexes_confirmed"] = confirmed
+        if not confirmed:
+            _filter = None
+            _pending = None
+            print("Identity filter disabled: unique indexes on users are missing")
+            return
+        _pending = []
+
+    try:
+        capacity = max(
+            Config.IDENTITY_FILTER_MIN_CAPACITY,
+            db.users.estimated_document_count() * 2
+        )
+        bloom = BloomFilter(capacity, Config.IDENTITY_FILTER_ERROR_RATE)
+
+        cursor = db.users.find({}, {"_id": 0, "aadhaar": 1, "email": 1}).batch_size(5000)
+        for user in cursor:
+            for key in _keys(user.get("aadhaar"), user.get("email")):
+                bloom.add(key)
+
+        with _lock:
+            for key in _pending:
+                bloom.add(key)
+            _filter = bloom
+            _stats["rebuilds"] += 1
+    finally:
+        with _lock:
+            _pending = None
+
+
+def identity_filter_stats():
+    with _lock:
+        return {
+            **_stats,
+            "ready": _filter is not None,
+            "items": _filter.count if _filter else 0,
+            "bits": _filter.size if _filter else 0
+        }
+
+
+def _rebuild_forever():
+    while True:
+        try:
+            build_identity_filter()
+        except Exception as e:
+            print("Identity filter build failed:", str(e))
+
+        time.sleep(Config.IDENTITY_FILTER_REBUILD_SECONDS)
+
+
+def start_identity_filter():
+    global _refresher
+
+    if _refresher is not None:
+        return
+
+    _refresher = threading.Thread(
+        target=_rebuild_forever,
+        name="identity-filter",
+        daemon=True
+    )
+    _refresher.start()
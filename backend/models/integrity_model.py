@@ -0,0 +1,35 @@
+from datetime import datetime
+from database.db import get_db
+
+
+def save_manifest(pqc_marker, path, manifest):
+    """
+    Merkle manifests live in their own collection, keyed by the file's
+    pqc_marker, so user documents stay small.
+    """
+    db = get_db()
+    db.integrity_manifests.replace_one(
+        {"_id": pqc_marker},
+        {
+            **manifest,
+            "_id": pqc_marker,
+            "path": path,
+            "created_at": datetime.utcnow()
+        },
+        upsert=True
+    )
+
+
+def get_manifest(pqc_marker):
+    db = get_db()
+    return db.integrity_manifests.find_one({"_id": pqc_marker})
+
+
+def get_manifest_by_path(path):
+    db = get_db()
+    return db.integrity_manifests.find_one({"path": path})
+
+
+def delete_manifest(pqc_marker):
+    db = get_db()
+    db.integrity_manifests.delete_one({"_id": pqc_marker})
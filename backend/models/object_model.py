@@ -0,0 +1,63 @@
+from datetime import datetime
+from pymongo import ReturnDocument
+from database.db import get_db
+
+
+def get_object(address):
+    db = get_db()
+    return db.objects.find_one({"_id": address})
+
+
+def add_object_reference(address):
+    """
+    Take one more reference on an existing object.
+    Returns the object, or None if it does not exist.
+    """
+    db = get_db()
+    return db.objects.find_one_and_update(
+        {"_id": address},
+        {"$inc": {"refcount": 1}},
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def create_object(address, path, file_format, stored):
+    """
+    Insert a new object holding its first reference.
+    Raises DuplicateKeyError if another writer created it first.
+    """
+    db = get_db()
+    db.objects.insert_one({
+        "_id": address,
+        "path": path,
+        "format": file_format,
+        "size": stored["size"],
+        "content_sha256": stored["content_sha256"],
+        "pqc_marker": stored["pqc_marker"],
+        "integrity_root": (stored.get("integrity") or {}).get("root"),
+        "key_version": stored.get("key_version"),
+        "refcount": 1,
+        "created_at": datetime.utcnow()
+    })
+
+
+def release_object_reference(address):
+    """
+    Drop one reference. Returns the object if this was the last one
+    and its record has been deleted, otherwise None.
+    """
+    db = get_db()
+    obj = db.objects.find_one_and_update(
+        {"_id": address},
+        {"$inc": {"refcount": -1}},
+        return_document=ReturnDocument.AFTER
+    )
+
+    if not obj or obj["refcount"] > 0:
+        return None
+
+    # Only delete if nobody took a new reference in the meantime
+    result = db.objects.delete_one({"_id": address, "refcount": {"$lte": 0}})
+
+    return obj if result.deleted_count else None
+
@@ -0,0 +1,81 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from config import Config
+
+# In-process read-through cache for user documents, keyed by user id.
+# Entries expire after USER_CACHE_TTL_SECONDS and the least recently used
+# ones are dropped beyond USER_CACHE_MAX_ENTRIES. Writers in this process
+# call invalidate_user(); the TTL bounds staleness for writes made by
+# other processes (other app workers, maintenance scripts).
+
+_entries = OrderedDict()
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0}
+
+# Bumped by every invalidation; a load that overlapped one is not cached,
+# since it may have read the document before that write landed
+_epoch = 0
+
+
+def get_cached_user(user_id, loader):
+    """
+    Return the user for user_id, calling loader() on a miss.
+    Callers get their own copy, so mutating it never touches the cache.
+    """
+    key = str(user_id)
+    now = time.monotonic()
+
+    with _lock:
+        entry = _entries.get(key)
+
+        if entry and entry[0] > now:
+            _entries.move_to_end(key)
+            _stats["hits"] += 1
+            return copy.deepcopy(entry[1])
+
+        _stats["misses"] += 1
+        epoch = _epoch
+
+    user = loader()
+
+    if user is not None:
+        with _lock:
+            if epoch != _epoch:
+                return copy.deepcopy(user)
+
+            _entries[key] = (now + Config.USER_CACHE_TTL_SECONDS, user)
+            _entries.move_to_end(key)
+
+            while len(_entries) > Config.USER_CACHE_MAX_ENTRIES:
+                _entries.popitem(last=False)
+                _stats["evictions"] += 1
+
+    return copy.deepcopy(user)
+
+
+def invalidate_user(user_id):
+    global _epoch
+
+    with _lock:
+        _epoch += 1
+        _entries.pop(str(user_id), None)
+        _stats["invalidations"] += 1
+
+
+def clear_user_cache():
+    with _lock:
+        _entries.clear()
+
+
+def user_cache_stats():
+    with _lock:
+        lookups = _stats["hits"] + _stats["misses"]
+
+        return {
+            **_stats,
+            "entries": len(_entries),
+            "hit_rate": round(_stats["hits"] / lookups, 4) if lookups else 0.0
+        }
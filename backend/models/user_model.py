@@ -1,14 +1,20 @@
 from datetime import datetime
 from database.db import get_db
+from models.identity_filter import add_identity, identity_may_exist
+from models.user_cache import get_cached_user, invalidate_user
 from bson import ObjectId
 
+DOCUMENT_TYPES = ["aadhaar", "pan", "passport", "voter", "driving"]
 
-def default_document_schema(path=None, uploaded=False):
+
+def default_document_schema(path=None, uploaded=False, object_id=None):
     return {
         "uploaded": uploaded,
         "verified": False,
         "path": path,
+        "object_id": object_id,
         "encryption": None,
+        "key_version": None,
         "pqc_enabled": False,
         "pqc_marker": None,
         "quantum_key": None,
@@ -17,7 +23,7 @@ def default_document_schema(path=None, uploaded=False):
     }
 
 
-def user_schema(data, biometric_path):
+def user_schema(data, biometric_path, biometric_object_id=None):
     return {
         "full_name": data.get("fullName"),
         "email": data.get("email"),
@@ -31,7 +37,8 @@ def user_schema(data, biometric_path):
             "aadhaar": {
                 **default_document_schema(
                     path=biometric_path,
-                    uploaded=True
+                    uploaded=True,
+                    object_id=biometric_object_id
                 ),
                 "uploaded_at": datetime.utcnow()
             },
@@ -45,12 +52,18 @@ def user_schema(data, biometric_path):
 
 def get_user_by_id(user_id):
     db = get_db()
-    return db.users.find_one({"_id": ObjectId(user_id)})
+    return get_cached_user(
+        user_id,
+        lambda: db.users.find_one({"_id": ObjectId(user_id)})
+    )
 
 
 def create_user(user_data):
     db = get_db()
-    return db.users.insert_one(user_data)
+    result = db.users.insert_one(user_data)
+    invalidate_user(result.inserted_id)
+    add_identity(user_data.get("aadhaar"), user_data.get("email"))
+    return result
 
 
 def get_user_by_aadhaar(aadhaar):
@@ -58,6 +71,30 @@ def get_user_by_aadhaar(aadhaar):
     return db.users.find_one({"aadhaar": aadhaar})
 
 
+def update_user_password(user_id, hashed_password):
+    db = get_db()
+    db.users.update_one(
+        {"_id": ObjectId(user_id)},
+        {"$set": {"password": hashed_password}}
+    )
+    invalidate_user(user_id)
+
+
+def identity_taken(aadhaar, email):
+    """
+    Enrollment duplicate check. The in-memory filter answers most new
+    identities without a database round trip.
+    """
+    if not identity_may_exist(aadhaar=aadhaar, email=email):
+        return False
+
+    db = get_db()
+    return db.users.find_one(
+        {"$or": [{"aadhaar": aadhaar}, {"email": email}]},
+        {"_id": 1}
+    ) is not None
+
+
 def get_user_by_email_or_aadhaar(identifier):
     db = get_db()
     return db.users.find_one({
@@ -66,3 +103,91 @@ def get_user_by_email_or_aadhaar(identifier):
             {"aadhaar": identifier}
         ]
     })
+
+
+def get_users_by_document_path(path):
+    """
+    Users with any document stored at path, with the matching doc types.
+    """
+    db = get_db()
+    users = db.users.find(
+        {"$or": [{f"documents.{t}.path": path} for t in DOCUMENT_TYPES]},
+        {f"documents.{t}.path": 1 for t in DOCUMENT_TYPES}
+        | {f"documents.{t}.pqc_marker": 1 for t in DOCUMENT_TYPES}
+        | {f"documents.{t}.integrity_status": 1 for t in DOCUMENT_TYPES}
+    )
+
+    for user in users:
+        documents = user.get("documents", {})
+        doc_types = [
+            t for t in DOCUMENT_TYPES
+            if documents.get(t, {}).get("path") == path
+        ]
+        yield user, doc_types
+
+
+# Admin listing: flat fields plus the per-document status flags only
+# (no paths, markers or AI results)
+USER_LIST_PROJECTION = {
+    "full_name": 1,
+    "email": 1,
+    "phone": 1,
+    "role": 1,
+    "created_at": 1,
+    **{
+        f"documents.{t}.{flag}": 1
+        for t in DOCUMENT_TYPES
+        for flag in ("uploaded", "verified", "rejected")
+    }
+}
+
+DOCUMENT_STATUS_FILTERS = {
+    "uploaded": {"uploaded": True},
+    "verified": {"uploaded": True, "verified": True},
+    "rejected": {"uploaded": True, "rejected": True},
+    "pending": {"uploaded": True, "verified": {"$ne": True}, "rejected": {"$ne": True}},
+    "missing": {"uploaded": {"$ne": True}}
+}
+
+
+def build_user_filter(role=None, doc_status=None, doc_type=None,
+                      created_from=None, created_to=None):
+    """
+    Mongo filter for the admin user listing. doc_status applies to
+    doc_type, or to any document type when doc_type is None.
+    """
+    query = {}
+
+    if role:
+        query["role"] = role
+
+    if doc_status:
+        conditions = DOCUMENT_STATUS_FILTERS[doc_status]
+        doc_types = [doc_type] if doc_type else DOCUMENT_TYPES
+        clauses = [
+            {f"documents.{t}.{field}": value for field, value in conditions.items()}
+            for t in doc_types
+        ]
+        query.update(clauses[0] if len(clauses) == 1 else {"$or": clauses})
+
+    if created_from or created_to:
+        query["created_at"] = {}
+        if created_from:
+            query["created_at"]["$gte"] = created_from
+        if created_to:
+            query["created_at"]["$lt"] = created_to
+
+    return query
+
+
+def iter_users(query, after_id=None, limit=0, projection=USER_LIST_PROJECTION, batch_size=500):
+    """
+    Keyset pagination on _id (newest first): pass the last _id of the
+    previous page as after_id. limit=0 means no limit.
+    """
+    db = get_db()
+
+    if after_id is not None:
+        query = {"$and": [query, {"_id": {"$lt": after_id}}]}
+
+    return db.users.find(query, projection).sort("_id", -1).limit(limit).batch_size(batch_size)
@@ -0,0 +1,92 @@
+import os
+import socket
+import threading
+from datetime import datetime, timedelta
+
+from pymongo.errors import DuplicateKeyError
+
+from database.db import get_db
+
+# Singleton background jobs (integrity scrubber, verification dispatcher)
+# only run in the process holding their lease document, so any number of
+# web workers still run one of each. The holder renews the lease while it
+# works; if it dies the lease expires and another process takes over.
+
+OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def acquire_lease(name, seconds, due_only=False):
+    """
+    Take or renew the named lease. With due_only, only if the job's
+    next_run_at has passed. True if this process now holds it.
+    """
+    db = get_db()
+    now = datetime.utcnow()
+
+    try:
+        db.worker_leases.update_one(
+            {"_id": name},
+            {"$setOnInsert": {"owner": None, "expires_at": None, "next_run_at": now}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        pass  # created concurrently by another process
+
+    query = {
+        "_id": name,
+        "$or": [
+            {"owner": OWNER},
+            {"expires_at": None},
+            {"expires_at": {"$lt": now}}
+        ]
+    }
+    if due_only:
+        query["next_run_at"] = {"$lte": now}
+
+    result = db.worker_leases.update_one(
+        query,
+        {"$set": {"owner": OWNER, "expires_at": now + timedelta(seconds=seconds)}}
+    )
+    return result.matched_count == 1
+
+
+def release_lease(name, next_run_in=None):
+    update = {"owner": None, "expires_at": None}
+    if next_run_in is not None:
+        update["next_run_at"] = datetime.utcnow() + timedelta(seconds=next_run_in)
+
+    get_db().worker_leases.update_one({"_id": name, "owner": OWNER}, {"$set": update})
+
+
+class LeaseKeeper:
+    """
+    Renews a held lease in the background for the duration of a with
+    block. lost is set if another process took the lease over.
+    """
+
+    def __init__(self, name, seconds):
+        self.name = name
+        self.seconds = seconds
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._renew, name=f"lease-{name}", daemon=True)
+
+    def _renew(self):
+        while not self._stop.wait(self.seconds / 3):
+            try:
+                held = acquire_lease(self.name, self.seconds)
+            except Exception as e:
+                print("Lease renewal error:", self.name, str(e))
+                continue
+
+            if not held:
+                self.lost.set()
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
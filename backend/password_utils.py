@@ -1,5 +1,71 @@
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import bcrypt
 
+from config import Config
+
+# bcrypt runs on its own small thread pool (bcrypt releases the GIL), so a
+# burst of logins can use at most BCRYPT_WORKERS cores. Once more than
+# BCRYPT_MAX_QUEUE calls are waiting, new ones fail fast with
+# PasswordHashingBusy instead of queueing behind the burst.
+
+_executor = None
+_lock = threading.Lock()
+_in_flight = 0
+_avg_seconds = 0.25
+
+
+class PasswordHashingBusy(Exception):
+
+    def __init__(self, retry_after):
+        super().__init__("Password hashing queue is full")
+        self.retry_after = retry_after
+
+
+def _get_executor():
+    global _executor
+
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=Config.BCRYPT_WORKERS,
+            thread_name_prefix="bcrypt"
+        )
+    return _executor
+
+
+def _timed(fn, *args):
+    global _avg_seconds
+
+    started = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        elapsed = time.perf_counter() - started
+        with _lock:
+            _avg_seconds = 0.8 * _avg_seconds + 0.2 * elapsed
+
+
+def _run(fn, *args):
+    global _in_flight
+
+    with _lock:
+        if _in_flight >= Config.BCRYPT_WORKERS + Config.BCRYPT_MAX_QUEUE:
+            # Roughly how long the current backlog takes to drain
+            retry_after = math.ceil(_in_flight * _avg_seconds / Config.BCRYPT_WORKERS)
+            raise PasswordHashingBusy(max(1, retry_after))
+
+        _in_flight += 1
+        executor = _get_executor()
+
+    try:
+        return executor.submit(_timed, fn, *args).result()
+    finally:
+        with _lock:
+            _in_flight -= 1
+
 
 def hash_password(password: str) -> str:
     """
@@ -9,7 +75,7 @@ def hash_password(password: str) -> str:
     password_bytes = password.encode("utf-8")
 
     # Generate salt + hash
-    hashed = bcrypt.hashpw(password_bytes, bcrypt.gensalt())
+    hashed = _run(bcrypt.hashpw, password_bytes, bcrypt.gensalt(Config.BCRYPT_ROUNDS))
 
     # Return string version (MongoDB friendly)
     return hashed.decode("utf-8")
@@ -22,5 +88,14 @@ def verify_password(password: str, hashed_password: str) -> bool:
     password_bytes = password.encode("utf-8")
     hashed_bytes = hashed_password.encode("utf-8")
 
-    return bcrypt.checkpw(password_bytes, hashed_bytes)
+    return _run(bcrypt.checkpw, password_bytes, hashed_bytes)
+
 
+def needs_rehash(hashed_password: str) -> bool:
+    """
+    True if the hash was made with a different cost than BCRYPT_ROUNDS.
+    """
+    try:
+        return int(hashed_password.split("$")[2]) != Config.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
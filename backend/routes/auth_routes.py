@@ -1,7 +1,8 @@
 from flask import Blueprint, request, jsonify
-from models.user_model import get_user_by_email_or_aadhaar
-from password_utils import verify_password
-from token_utils import generate_token
+from models.user_model import get_user_by_email_or_aadhaar, update_user_password
+from password_utils import PasswordHashingBusy, hash_password, needs_rehash, verify_password
+from token_utils import generate_token, revoke_token
+from utils.auth_middleware import token_required
 
 auth_bp = Blueprint("auth_bp", __name__)
 
@@ -17,8 +18,22 @@ def login():
     if not user:
         return jsonify({"message": "User not found"}), 404
 
-    if not verify_password(password, user["password"]):
-        return jsonify({"message": "Invalid credentials"}), 401
+    try:
+        if not verify_password(password, user["password"]):
+            return jsonify({"message": "Invalid credentials"}), 401
+
+    except PasswordHashingBusy as e:
+        return jsonify({"message": "Server busy, try again shortly"}), 503, {
+            "Retry-After": str(e.retry_after)
+        }
+
+    # Upgrade hashes made with an older cost factor; if the hashing pool
+    # is busy, skip it and upgrade on a later login
+    if needs_rehash(user["password"]):
+        try:
+            update_user_password(user["_id"], hash_password(password))
+        except PasswordHashingBusy:
+            pass
 
     token = generate_token(user)
 
@@ -27,3 +42,9 @@ def login():
         "token": token
     }), 200
 
+
+@auth_bp.route("/logout", methods=["POST"])
+@token_required
+def logout(current_user):
+    revoke_token(current_user)
+    return jsonify({"message": "Logged out"}), 200
@@ -1,21 +1,151 @@
-from flask import Blueprint, jsonify, request, send_file, current_app
-from models.user_model import get_user_by_id
+from flask import Blueprint, Response, jsonify, request, current_app
+from models.user_model import (
+    DOCUMENT_STATUS_FILTERS,
+    build_user_filter,
+    get_user_by_id,
+    iter_users
+)
+from models.integrity_model import get_manifest
+from models.identity_filter import identity_filter_stats
+from models.user_cache import invalidate_user, user_cache_stats
 from database.db import get_db
 from werkzeug.utils import secure_filename
 from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
 from utils.auth_middleware import token_required, role_required
-from services.encryption_service import EncryptionService
-from services.pqc_service import PQCService
-from services.ai_verification_service import AIVerificationService
-from io import BytesIO
-import io
-import uuid
+from services.pqc_service import IntegrityError, PQCService
+from services.ocr_cache import OCRCache
+from services.document_reader import DocumentReader
+from services.document_store import DocumentStore
+from services.upload_pipeline import (
+    UploadFieldMissing,
+    UploadTooLarge,
+    open_multipart_file
+)
+from services.verification_queue import (
+    enqueue_verification,
+    get_job,
+    pending_verification
+)
+from datetime import datetime
+import json
 import os
 
 biometric_bp = Blueprint("biometric_bp", __name__)
 
 ALLOWED_DOC_TYPES = ["aadhaar", "pan", "passport", "driving", "voter"]
 
+
+def review_update(doc_type, action):
+    """
+    $set applied when an admin verifies or rejects a document.
+    """
+    if action == "verify":
+        return {f"documents.{doc_type}.verified": True}
+
+    return {
+        f"documents.{doc_type}.verified": False,
+        f"documents.{doc_type}.rejected": True
+    }
+
+
+def not_modified(etag):
+    """
+    304 for a client that already holds this exact document version.
+    """
+    if etag and request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    return None
+
+
+def document_manifest(document):
+    """
+    The document's Merkle manifest, or None. A manifest whose root is not
+    the one recorded with the document (swapped or regenerated) raises
+    IntegrityError.
+    """
+    stored_marker = document.get("pqc_marker")
+    manifest = get_manifest(stored_marker) if stored_marker else None
+
+    if manifest and manifest.get("root") != document.get("integrity_root"):
+        raise IntegrityError("Manifest root does not match the document")
+
+    return manifest
+
+
+def document_response(file_path, doc_type, etag, allow_plain=False, manifest=None):
+    """
+    Stream a stored document back decrypted, honouring single byte-range
+    requests. Only the segments covering the range are read, checked
+    against the Merkle manifest and decrypted.
+    """
+    try:
+        reader = DocumentReader(file_path, allow_plain=allow_plain, manifest=manifest)
+    except IntegrityError:
+        return jsonify({"message": "Integrity check failed"}), 403
+
+    start, stop = 0, reader.size
+    status = 200
+
+    # Ignore the range if If-Range names an older version
+    if_range = request.if_range
+    range_applies = not if_range.etag or if_range.etag == etag
+
+    if request.range and range_applies:
+        byte_range = request.range.range_for_length(reader.size)
+
+        if byte_range is None:
+            reader.close()
+            response = Response(status=416)
+            response.headers["Content-Range"] = f"bytes */{reader.size}"
+            return response
+
+        start, stop = byte_range
+        status = 206
+
+    try:
+        # Decrypt the first segment up front so key errors fail the request
+        chunks = reader.iter_range(start, stop)
+        first_chunk = next(chunks, b"")
+    except IntegrityError:
+        reader.close()
+        return jsonify({"message": "Integrity check failed"}), 403
+    except Exception:
+        reader.close()
+        raise
+
+    def generate():
+        try:
+            yield first_chunk
+            yield from chunks
+        finally:
+            reader.close()
+
+    response = Response(
+        generate(),
+        status=status,
+        mimetype="application/pdf",
+        direct_passthrough=True,
+        headers={
+            "Content-Disposition": f"inline; filename={doc_type}.pdf",
+            "Content-Length": str(stop - start),
+            "Accept-Ranges": "bytes",
+            "Cache-Control": "private, no-cache"
+        }
+    )
+
+    if status == 206:
+        response.headers["Content-Range"] = f"bytes {start}-{stop - 1}/{reader.size}"
+
+    if etag:
+        response.set_etag(etag)
+
+    return response
+
+
 @biometric_bp.route("/admin/user/<user_id>", methods=["GET"])
 @role_required("admin")
 def get_single_user(current_user, user_id):
@@ -47,13 +177,9 @@ def reject_document(current_user, doc_type):
 
     db.users.update_one(
         {"_id": ObjectId(user_id)},
-        {
-            "$set": {
-                f"documents.{doc_type}.verified": False,
-                f"documents.{doc_type}.rejected": True
-            }
-        }
+        {"$set": review_update(doc_type, "reject")}
     )
+    invalidate_user(user_id)
 
     return jsonify({"message": f"{doc_type} rejected"}), 200
 
@@ -80,27 +206,32 @@ def admin_view_document(current_user, user_id, doc_type):
     if not os.path.exists(file_path):
         return jsonify({"message": "File not found"}), 404
 
-    with open(file_path, "rb") as f:
-        file_data = f.read()
+    # The marker changes with every upload, so it doubles as the ETag
+    stored_marker = document.get("pqc_marker")
+
+    cached = not_modified(stored_marker)
+    if cached:
+        return cached
 
-    # Try decrypting
+    # Integrity check (only if encrypted): chunk by chunk while streaming
+    # when there is a Merkle manifest, otherwise over the whole file
     try:
-        decrypted_data = EncryptionService.decrypt_bytes(file_data)
-    except Exception:
-        decrypted_data = file_data  # fallback if not encrypted
+        manifest = document_manifest(document)
+    except IntegrityError:
+        return jsonify({"message": "Integrity check failed"}), 403
 
-    # Integrity check (only if encrypted)
-    stored_marker = document.get("pqc_marker")
-    if stored_marker:
-        calculated_marker = PQCService.create_pqc_marker(file_data)
+    if stored_marker and not manifest:
+        calculated_marker = PQCService.create_pqc_marker_for_file(file_path)
         if stored_marker != calculated_marker:
             return jsonify({"message": "Integrity check failed"}), 403
 
-    return send_file(
-        io.BytesIO(decrypted_data),
-        download_name=f"{doc_type}.pdf",
-        mimetype="application/pdf",
-        as_attachment=False
+    # Fall back to the raw bytes if the file was stored unencrypted
+    return document_response(
+        file_path,
+        doc_type,
+        stored_marker,
+        allow_plain=True,
+        manifest=manifest
     )
 
 # ================= ADMIN ROUTES =================
@@ -120,23 +251,200 @@ def verify_document(current_user, doc_type):
 
     db.users.update_one(
         {"_id": ObjectId(user_id)},
-        {"$set": {f"documents.{doc_type}.verified": True}}
+        {"$set": review_update(doc_type, "verify")}
     )
+    invalidate_user(user_id)
 
     return jsonify({"message": f"{doc_type} verified successfully"}), 200
 
 
+@biometric_bp.route("/admin/bulk-review", methods=["POST"])
+@role_required("admin")
+def bulk_review(current_user):
+    """
+    Apply many verify / reject decisions in one unordered bulk_write.
+
+    Body: {"operations": [{"user_id", "doc_type", "action"}, ...]}
+    Returns one result per operation, in request order.
+    """
+    operations = (request.get_json(silent=True) or {}).get("operations")
+
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"message": "Operations required"}), 400
+
+    if len(operations) > current_app.config["BULK_REVIEW_MAX_OPERATIONS"]:
+        return jsonify({"message": "Too many operations"}), 413
+
+    results = [None] * len(operations)
+    valid = []
+
+    for i, op in enumerate(operations):
+        op = op if isinstance(op, dict) else {}
+        user_id = op.get("user_id")
+
+        if op.get("action") not in ("verify", "reject"):
+            results[i] = {"status": "error", "message": "Invalid action"}
+        elif op.get("doc_type") not in ALLOWED_DOC_TYPES:
+            results[i] = {"status": "error", "message": "Invalid document type"}
+        elif not isinstance(user_id, str) or not ObjectId.is_valid(user_id):
+            results[i] = {"status": "error", "message": "Invalid user ID"}
+        else:
+            valid.append((i, ObjectId(user_id), op["doc_type"], op["action"]))
+
+    db = get_db()
+
+    # One read to report missing users / documents per item
+    uploaded = {
+        user["_id"]: {
+            t for t, doc in user.get("documents", {}).items()
+            if doc.get("uploaded")
+        }
+        for user in db.users.find(
+            {"_id": {"$in": list({user_id for _, user_id, _, _ in valid})}},
+            {f"documents.{t}.uploaded": 1 for t in ALLOWED_DOC_TYPES}
+        )
+    }
+
+    writes = []
+    write_index = []
+
+    for i, user_id, doc_type, action in valid:
+        if user_id not in uploaded:
+            results[i] = {"status": "error", "message": "User not found"}
+        elif doc_type not in uploaded[user_id]:
+            results[i] = {"status": "error", "message": "Document not uploaded"}
+        else:
+            writes.append(UpdateOne(
+                {"_id": user_id, f"documents.{doc_type}.uploaded": True},
+                {"$set": review_update(doc_type, action)}
+            ))
+            write_index.append(i)
+
+    if writes:
+        try:
+            db.users.bulk_write(writes, ordered=False)
+            failed = {}
+        except BulkWriteError as e:
+            failed = {
+                error["index"]: error.get("errmsg", "Write failed")
+                for error in e.details.get("writeErrors", [])
+            }
+
+        for n, i in enumerate(write_index):
+            if n in failed:
+                results[i] = {"status": "error", "message": failed[n]}
+            else:
+                results[i] = {"status": "ok", "action": operations[i]["action"]}
+
+        for user_id in {valid_op[1] for valid_op in valid}:
+            invalidate_user(user_id)
+
+    return jsonify({
+        "applied": sum(1 for r in results if r["status"] == "ok"),
+        "failed": sum(1 for r in results if r["status"] == "error"),
+        "results": [
+            {
+                "user_id": op.get("user_id") if isinstance(op, dict) else None,
+                "doc_type": op.get("doc_type") if isinstance(op, dict) else None,
+                **result
+            }
+            for op, result in zip(operations, results)
+        ]
+    }), 200
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
 @biometric_bp.route("/all-users", methods=["GET"])
 @role_required("admin")
 def get_all_users(current_user):
+    """
+    Keyset-paginated user listing (newest first).
 
-    db = get_db()
-    users = list(db.users.find({}, {"password": 0}))
+    Query params: limit, cursor (X-Next-Cursor from the previous page),
+    role, doc_status (uploaded/verified/rejected/pending/missing),
+    doc_type, created_from / created_to (ISO dates), format=ndjson for
+    a streamed export of every matching user.
+    """
+    args = request.args
+
+    doc_status = args.get("doc_status")
+    doc_type = args.get("doc_type")
+    cursor = args.get("cursor")
+
+    try:
+        limit = int(args.get("limit", current_app.config["USER_LIST_PAGE_SIZE"]))
+        created_from = args.get("created_from")
+        created_to = args.get("created_to")
+        created_from = datetime.fromisoformat(created_from) if created_from else None
+        created_to = datetime.fromisoformat(created_to) if created_to else None
+    except ValueError:
+        return jsonify({"message": "Invalid limit or date"}), 400
+
+    if doc_status and doc_status not in DOCUMENT_STATUS_FILTERS:
+        return jsonify({"message": "Invalid document status"}), 400
+    if doc_type and doc_type not in ALLOWED_DOC_TYPES:
+        return jsonify({"message": "Invalid document type"}), 400
+    if cursor and not ObjectId.is_valid(cursor):
+        return jsonify({"message": "Invalid cursor"}), 400
+
+    query = build_user_filter(
+        role=args.get("role"),
+        doc_status=doc_status,
+        doc_type=doc_type,
+        created_from=created_from,
+        created_to=created_to
+    )
+    after_id = ObjectId(cursor) if cursor else None
+
+    if args.get("format") == "ndjson":
+        users = iter_users(query, after_id, limit=max(limit, 0) if "limit" in args else 0)
+
+        def generate():
+            for user in users:
+                yield json.dumps(user, default=_json_default) + "\n"
+
+        return Response(
+            generate(),
+            mimetype="application/x-ndjson",
+            headers={"Content-Disposition": "attachment; filename=users.ndjson"}
+        )
+
+    limit = min(max(limit, 1), current_app.config["USER_LIST_MAX_PAGE_SIZE"])
+    users = list(iter_users(query, after_id, limit=limit))
 
     for user in users:
         user["_id"] = str(user["_id"])
 
-    return jsonify(users)
+    response = jsonify(users)
+
+    # A full page means there may be more
+    if len(users) == limit:
+        response.headers["X-Next-Cursor"] = users[-1]["_id"]
+
+    return response
+
+
+@biometric_bp.route("/admin/ocr-cache-stats", methods=["GET"])
+@role_required("admin")
+def ocr_cache_stats(current_user):
+    return jsonify(OCRCache.stats())
+
+
+@biometric_bp.route("/admin/user-cache-stats", methods=["GET"])
+@role_required("admin")
+def get_user_cache_stats(current_user):
+    return jsonify(user_cache_stats())
+
+
+@biometric_bp.route("/admin/identity-filter-stats", methods=["GET"])
+@role_required("admin")
+def get_identity_filter_stats(current_user):
+    return jsonify(identity_filter_stats())
 
 
 # ================= USER ROUTES =================
@@ -174,17 +482,26 @@ def view_document(current_user, doc_type):
     if not os.path.exists(file_path):
         return jsonify({"message": "File not found"}), 404
 
-    with open(file_path, "rb") as f:
-        encrypted_data = f.read()
-
-    # Integrity check
     stored_marker = document.get("pqc_marker")
-    calculated_marker = PQCService.create_pqc_marker(encrypted_data)
 
-    if stored_marker and stored_marker != calculated_marker:
+    cached = not_modified(stored_marker)
+    if cached:
+        return cached
+
+    # Integrity check: chunk by chunk while streaming when there is a
+    # Merkle manifest, otherwise over the whole file (if there is a
+    # marker to compare against)
+    try:
+        manifest = document_manifest(document)
+    except IntegrityError:
         return jsonify({"message": "Integrity check failed"}), 403
 
-    decrypted_data = EncryptionService.decrypt_bytes(encrypted_data)
+    if stored_marker and not manifest:
+        calculated_marker = PQCService.create_pqc_marker_for_file(file_path)
+
+        if stored_marker != calculated_marker:
+            return jsonify({"message": "Integrity check failed"}), 403
+
     file_ext = file_path.split(".")[-1].lower()
     
     mime_map = {
@@ -194,12 +511,7 @@ def view_document(current_user, doc_type):
     	"jpeg": "image/jpeg"
     }
     
-    return send_file(
-        io.BytesIO(decrypted_data),
-    	download_name=f"{doc_type}.pdf",
-    	mimetype="application/pdf",
-    	as_attachment=False
-    )
+    return document_response(file_path, doc_type, stored_marker, manifest=manifest)
 
 
 @biometric_bp.route("/upload-document/<doc_type>", methods=["POST"])
@@ -213,64 +525,95 @@ def upload_document(current_user, doc_type):
     if not user:
         return jsonify({"message": "User not found"}), 404
 
-    file = request.files.get("file")
-    if not file:
+    boundary = request.mimetype_params.get("boundary")
+    if request.mimetype != "multipart/form-data" or not boundary:
         return jsonify({"message": "File required"}), 400
 
-    filename = secure_filename(file.filename)
-    unique_filename = f"{uuid.uuid4()}_{filename}"
-
-    upload_folder = current_app.config["UPLOAD_FOLDER"]
-    os.makedirs(upload_folder, exist_ok=True)
+    # 🔐 Single pass: request stream -> SHA-256 + AES-256-GCM -> SHA-512 -> disk
+    try:
+        filename, chunks = open_multipart_file(request.stream, boundary, "file")
 
-    filepath = os.path.join(upload_folder, unique_filename)
-    file.save(filepath)
+        filename = secure_filename(filename or "")
+        stored = DocumentStore.put(chunks, os.path.splitext(filename)[1])
 
-    # 🤖 AI Verification
-    ai_result = AIVerificationService.verify_document(
-        filepath,
-        doc_type,
-        user
-    )
-    
-    if ai_result and ai_result["status"] == "auto_verified":
-    	verified_status = True
-    else:
-    	verified_status = False
-    
-    # 🔐 AES Encryption
-    with open(filepath, "rb") as f:
-        original_data = f.read()
-
-    encrypted_data = EncryptionService.encrypt_bytes(original_data)
+    except UploadFieldMissing:
+        return jsonify({"message": "File required"}), 400
+    except UploadTooLarge:
+        return jsonify({"message": "File too large"}), 413
+    except ValueError:
+        return jsonify({"message": "Malformed upload"}), 400
 
-    with open(filepath, "wb") as f:
-        f.write(encrypted_data)
+    # 🤖 AI Verification (queued once the document is saved)
+    job_id = ObjectId()
+    ai_result = pending_verification(doc_type, job_id)
 
     # 🧠 PQC Simulation
     quantum_key = PQCService.generate_quantum_safe_key()
-    pqc_marker = PQCService.create_pqc_marker(encrypted_data)
+    pqc_marker = stored["pqc_marker"]
+    filepath = stored["path"]
 
     # 💾 Update DB
     db = get_db()
 
-    db.users.update_one(
+    previous = db.users.find_one_and_update(
         {"_id": user["_id"]},
         {
             "$set": {
                 f"documents.{doc_type}.uploaded": True,
                 f"documents.{doc_type}.verified": False,
                 f"documents.{doc_type}.path": filepath,
-                f"documents.{doc_type}.encryption": "AES-256",
+                f"documents.{doc_type}.object_id": stored["object_id"],
+                f"documents.{doc_type}.encryption": "AES-256-GCM",
                 f"documents.{doc_type}.pqc_enabled": True,
                 f"documents.{doc_type}.pqc_marker": pqc_marker,
+                f"documents.{doc_type}.integrity_root": stored["integrity_root"],
+                f"documents.{doc_type}.key_version": stored["key_version"],
+                f"documents.{doc_type}.content_sha256": stored["content_sha256"],
+                f"documents.{doc_type}.size": stored["size"],
                 f"documents.{doc_type}.quantum_key": quantum_key,
                 f"documents.{doc_type}.ai_verification": ai_result
             }
-        }
+        },
+        projection={f"documents.{doc_type}.object_id": 1},
+        return_document=ReturnDocument.BEFORE
     )
+    invalidate_user(user["_id"])
+
+    # The replaced upload no longer references its stored object
+    old_object_id = previous["documents"].get(doc_type, {}).get("object_id") if previous else None
+    if old_object_id:
+        DocumentStore.release(old_object_id)
+
+    enqueue_verification(job_id, user["_id"], doc_type, filepath)
 
     return jsonify({
         "message": f"{doc_type.capitalize()} uploaded successfully",
-        "ai_status": ai_result["status"] if ai_result else "manual_review"
-    }), 200
+        "ai_status": ai_result["status"],
+        "job_id": str(job_id)
+    }), 202
+
+
+@biometric_bp.route("/verification-job/<job_id>", methods=["GET"])
+@token_required
+def verification_job_status(current_user, job_id):
+
+    if not ObjectId.is_valid(job_id):
+        return jsonify({"message": "Invalid job id"}), 400
+
+    job = get_job(job_id)
+
+    if not job or (
+        str(job["user_id"]) != current_user["user_id"]
+        and current_user.get("role") != "admin"
+    ):
+        return jsonify({"message": "Job not found"}), 404
+
+    return jsonify({
+        "job_id": str(job["_id"]),
+        "doc_type": job["doc_type"],
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "result": job["result"],
+        "created_at": job["created_at"],
+        "finished_at": job["finished_at"]
+    })
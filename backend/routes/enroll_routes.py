@@ -1,10 +1,10 @@
 from flask import Blueprint, request, jsonify, current_app
-from models.user_model import create_user, get_user_by_aadhaar, user_schema
-from password_utils import hash_password
-from werkzeug.utils import secure_filename
+from models.user_model import create_user, identity_taken, user_schema
+from password_utils import PasswordHashingBusy, hash_password
+from pymongo.errors import DuplicateKeyError
+from services.document_store import DocumentStore
+from services.upload_pipeline import iter_file_chunks
 from datetime import datetime
-import os
-import uuid
 
 enroll_bp = Blueprint("enroll_bp", __name__)
 
@@ -30,7 +30,7 @@ def enroll():
             return jsonify({"message": "Biometric document required"}), 400
 
         # Duplicate check
-        if get_user_by_aadhaar(aadhaar):
+        if identity_taken(aadhaar, email):
             return jsonify({"message": "User already enrolled"}), 409
 
         # Validate extension
@@ -44,19 +44,16 @@ def enroll():
         if extension not in allowed_extensions:
             return jsonify({"message": "Invalid file type"}), 400
 
-        # Secure filename
-        filename = secure_filename(file.filename)
-        unique_filename = f"{uuid.uuid4()}_{filename}"
-
-        upload_folder = current_app.config["UPLOAD_FOLDER"]
-        os.makedirs(upload_folder, exist_ok=True)
-
-        filepath = os.path.join(upload_folder, unique_filename)
-        file.save(filepath)
-
-        # Hash password
+        # Hash password (before touching storage, so a shed request costs nothing)
         hashed_password = hash_password(password)
 
+        # Store in the content-addressed store (kept unencrypted)
+        stored = DocumentStore.put(
+            iter_file_chunks(file.stream),
+            f".{extension}",
+            encrypt=False
+        )
+
         # Use professional schema
         user_data = user_schema(
             {
@@ -66,16 +63,30 @@ def enroll():
                 "aadhaar": aadhaar,
                 "password": hashed_password
             },
-            filepath
+            stored["path"],
+            biometric_object_id=stored["object_id"]
         )
 
-        create_user(user_data)
+        try:
+            create_user(user_data)
+        except Exception as e:
+            DocumentStore.release(stored["object_id"])
+
+            # Unique aadhaar / email index
+            if isinstance(e, DuplicateKeyError):
+                return jsonify({"message": "User already enrolled"}), 409
+            raise
 
         return jsonify({
             "message": "Enrollment successful",
             "status": "pending_verification"
         }), 201
 
+    except PasswordHashingBusy as e:
+        return jsonify({"message": "Server busy, try again shortly"}), 503, {
+            "Retry-After": str(e.retry_after)
+        }
+
     except Exception as e:
         return jsonify({
             "message": "Enrollment failed",
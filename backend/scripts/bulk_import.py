@@ -0,0 +1,282 @@
+"""
+Bulk enrollment import.
+
+Reads a manifest (NDJSON or CSV) with the same fields as the enroll form:
+
+    fullName, email, phone, aadhaar, password, idFile[, verified]
+
+where idFile names an ID document inside --files (a directory, .zip or
+.tar/.tar.gz archive). Rows are processed in batches: duplicates are
+checked with one $in query per batch, passwords are hashed on a process
+pool, ID files go through the document store, and users are inserted with
+insert_many. Progress is checkpointed after every batch, so re-running the
+same command resumes after the last completed batch. Rejected rows are
+written to <manifest>.errors.ndjson.
+
+Run from the backend folder:
+
+    python -m scripts.bulk_import users.csv --files ids.zip [--batch-size 500]
+"""
+import argparse
+import csv
+import io
+import json
+import multiprocessing
+import os
+import tarfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from itertools import islice
+
+import bcrypt
+from pymongo.errors import BulkWriteError
+
+from config import Config
+from database.db import connect_db, get_db
+from models.user_model import user_schema
+from services.document_store import DocumentStore
+from services.upload_pipeline import iter_file_chunks
+
+REQUIRED_FIELDS = ["fullName", "email", "phone", "aadhaar", "password", "idFile"]
+
+
+def hash_password(password):
+    # Runs in a pool worker
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(Config.BCRYPT_ROUNDS)).decode("utf-8")
+
+
+def read_manifest(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith((".ndjson", ".jsonl")):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+class FileSource:
+    """
+    ID files from a directory, a zip or a tar archive.
+    """
+
+    def __init__(self, path):
+        self._dir = self._zip = self._tar = None
+        self._lock = threading.Lock()
+
+        if os.path.isdir(path):
+            self._dir = path
+        elif zipfile.is_zipfile(path):
+            self._zip = zipfile.ZipFile(path)
+        else:
+            self._tar = tarfile.open(path)
+
+    def open(self, name):
+        if self._dir:
+            full_path = os.path.realpath(os.path.join(self._dir, name))
+            if not full_path.startswith(os.path.realpath(self._dir) + os.sep):
+                raise FileNotFoundError(name)
+            return open(full_path, "rb")
+        if self._zip:
+            return self._zip.open(name)
+
+        # tarfile is not thread-safe: read the member in one go
+        with self._lock:
+            member = self._tar.extractfile(name)
+            if member is None:
+                raise FileNotFoundError(name)
+            return io.BytesIO(member.read())
+
+
+class Checkpoint:
+
+    def __init__(self, path):
+        self.path = path
+        self.state = {"rows_done": 0, "imported": 0, "duplicates": 0, "errors": 0}
+
+        if os.path.exists(path):
+            with open(path) as f:
+                self.state.update(json.load(f))
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.path)
+
+
+def validate(row):
+    for field in REQUIRED_FIELDS:
+        if row.get(field) is not None:
+            row[field] = str(row[field])
+
+    missing = [field for field in REQUIRED_FIELDS if not row.get(field)]
+    if missing:
+        return "Missing " + ", ".join(missing)
+
+    name = row["idFile"]
+    if "." not in name or name.rsplit(".", 1)[1].lower() not in Config.ALLOWED_EXTENSIONS:
+        return "Invalid file type"
+
+    return None
+
+
+def import_batch(batch, files, hash_pool, io_pool, errors_out):
+    """
+    batch is a list of (row_number, row). Returns (imported, duplicates, errors).
+    """
+    db = get_db()
+    rejected = []
+
+    def reject(row_number, reason):
+        rejected.append((row_number, reason))
+
+    valid = []
+    for row_number, row in batch:
+        reason = validate(row)
+        if reason:
+            reject(row_number, reason)
+        else:
+            valid.append((row_number, row))
+
+    # Duplicates against the database, one query for the whole batch
+    existing = db.users.find(
+        {"$or": [
+            {"aadhaar": {"$in": [row["aadhaar"] for _, row in valid]}},
+            {"email": {"$in": [row["email"] for _, row in valid]}}
+        ]},
+        {"aadhaar": 1, "email": 1}
+    )
+    taken = set()
+    for user in existing:
+        taken.add(("aadhaar", user.get("aadhaar")))
+        taken.add(("email", user.get("email")))
+
+    fresh = []
+    duplicates = 0
+    for row_number, row in valid:
+        keys = {("aadhaar", row["aadhaar"]), ("email", row["email"])}
+        if keys & taken:
+            duplicates += 1
+            continue
+        # ... and within the batch itself
+        taken |= keys
+        fresh.append((row_number, row))
+
+    def store(row):
+        ext = "." + row["idFile"].rsplit(".", 1)[1].lower()
+        with files.open(row["idFile"]) as f:
+            return DocumentStore.put(iter_file_chunks(f), ext, encrypt=False)
+
+    hashes = hash_pool.map(hash_password, [row["password"] for _, row in fresh], chunksize=16)
+    stored = list(io_pool.map(lambda item: _try(store, item[1]), fresh))
+
+    users = []
+    user_rows = []
+    for (row_number, row), hashed, (obj, error) in zip(fresh, hashes, stored):
+        if error:
+            reject(row_number, f"ID file: {error}")
+            continue
+
+        user = user_schema(
+            {**row, "password": hashed},
+            obj["path"],
+            biometric_object_id=obj["object_id"]
+        )
+        if str(row.get("verified", "")).lower() in ("1", "true", "yes"):
+            user["documents"]["aadhaar"]["verified"] = True
+
+        users.append(user)
+        user_rows.append((row_number, obj))
+
+    inserted = len(users)
+
+    for start in range(0, len(users), Config.BULK_IMPORT_INSERT_CHUNK):
+        chunk = users[start:start + Config.BULK_IMPORT_INSERT_CHUNK]
+        chunk_rows = user_rows[start:start + Config.BULK_IMPORT_INSERT_CHUNK]
+
+        try:
+            db.users.insert_many(chunk, ordered=False)
+        except BulkWriteError as e:
+            # Lost a race with a live enrollment (unique index)
+            for error in e.details.get("writeErrors", []):
+                row_number, obj = chunk_rows[error["index"]]
+                DocumentStore.release(obj["object_id"])
+                reject(row_number, error.get("errmsg", "Insert failed"))
+                inserted -= 1
+
+    for row_number, reason in rejected:
+        errors_out.write(json.dumps({"row": row_number, "error": reason}) + "\n")
+    errors_out.flush()
+
+    return inserted, duplicates, len(rejected)
+
+
+def _try(fn, *args):
+    try:
+        return fn(*args), None
+    except Exception as e:
+        return None, str(e)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("manifest", help="NDJSON or CSV manifest")
+    parser.add_argument("--files", required=True, help="directory, .zip or .tar(.gz) of ID files")
+    parser.add_argument("--batch-size", type=int, default=Config.BULK_IMPORT_BATCH_SIZE)
+    parser.add_argument("--hash-workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--io-workers", type=int, default=8)
+    parser.add_argument("--checkpoint", help="default: <manifest>.checkpoint")
+    args = parser.parse_args()
+
+    connect_db(Config.MONGO_URI)
+    os.makedirs(Config.UPLOAD_FOLDER, exist_ok=True)
+
+    checkpoint = Checkpoint(args.checkpoint or args.manifest + ".checkpoint")
+    files = FileSource(args.files)
+    state = checkpoint.state
+
+    if state["rows_done"]:
+        print(f"Resuming after row {state['rows_done']}")
+
+    rows = enumerate(read_manifest(args.manifest), start=1)
+    rows = islice(rows, state["rows_done"], None)
+
+    started = time.perf_counter()
+    processed = 0
+
+    with ProcessPoolExecutor(
+        max_workers=args.hash_workers,
+        mp_context=multiprocessing.get_context("spawn")
+    ) as hash_pool, ThreadPoolExecutor(max_workers=args.io_workers) as io_pool, \
+            open(args.manifest + ".errors.ndjson", "a") as errors_out:
+
+        while True:
+            batch = list(islice(rows, args.batch_size))
+            if not batch:
+                break
+
+            imported, duplicates, errors = import_batch(batch, files, hash_pool, io_pool, errors_out)
+
+            state["rows_done"] = batch[-1][0]
+            state["imported"] += imported
+            state["duplicates"] += duplicates
+            state["errors"] += errors
+            state["updated_at"] = datetime.utcnow().isoformat()
+            checkpoint.save()
+
+            processed += len(batch)
+            rate = processed / (time.perf_counter() - started)
+            print(
+                f"row {state['rows_done']}: +{imported} imported, {duplicates} duplicates, "
+                f"{errors} errors ({rate:.0f} rows/s)"
+            )
+
+    print("Import finished:", {k: v for k, v in state.items() if k != "updated_at"})
+
+
+if __name__ == "__main__":
+    main()
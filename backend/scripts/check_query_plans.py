@@ -0,0 +1,340 @@
+"""
+Query plan regression check.
+
+Runs the real model / service functions against a recording stand-in
+database to capture the exact filters and sorts they send, then creates
+a scratch database on the configured MongoDB server, applies the managed
+index set (database/indexes.py), seeds it with non-matching filler
+documents and explains every captured query. A query fails if it does a
+collection scan (COLLSCAN) or examines more documents than it returns,
+which also catches a filter that only walks the _id index for its sort.
+
+Needs a reachable mongod (MONGO_URI); tests/test_query_plans.py runs the
+same check and is skipped without one. Run from the backend folder:
+
+    python -m scripts.check_query_plans [--keep]
+"""
+import argparse
+import sys
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from bson import ObjectId
+from pymongo import MongoClient
+
+import database.db as database
+import token_utils
+from config import Config
+from database.indexes import ensure_indexes
+from models.integrity_model import get_manifest, get_manifest_by_path
+from models.object_model import add_object_reference, get_object, release_object_reference
+from models.user_model import (
+    DOCUMENT_TYPES,
+    build_user_filter,
+    get_user_by_aadhaar,
+    get_user_by_email_or_aadhaar,
+    get_user_by_id,
+    get_users_by_document_path,
+    identity_taken,
+    iter_users
+)
+from models.worker_lease_model import acquire_lease
+from scripts.rotate_keys import claim_next_object, purge_retired_files, repoint_documents
+from services.verification_queue import _claim_next_job, get_job
+
+SCRATCH_SUFFIX = "_plan_check"
+FILLER_DOCUMENTS = 300
+
+# Documents a query may examine beyond those it returns
+EXAMINED_SLACK = 5
+
+PATH = "/uploads/objects/ab/cd/abcd.pdf"
+
+
+class _Cursor:
+
+    def __init__(self, query):
+        self.query = query
+
+    def sort(self, key, direction=None):
+        self.query["sort"] = [(key, direction)] if direction is not None else list(key)
+        return self
+
+    def limit(self, limit):
+        self.query["limit"] = limit
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    def __iter__(self):
+        return iter(self.query.pop("results", []))
+
+
+class _Collection:
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def _record(self, query, sort=None, limit=0):
+        entry = {"collection": self.name, "filter": query or {}, "sort": sort, "limit": limit}
+        self.recorder.queries.append(entry)
+        return entry
+
+    def find(self, query=None, *args, **kwargs):
+        entry = self._record(query)
+        entry["results"] = list(self.recorder.results.get(self.name, []))
+        return _Cursor(entry)
+
+    def find_one(self, query=None, *args, **kwargs):
+        self._record(query, limit=1)
+        results = self.recorder.results.get(self.name)
+        return dict(results[0]) if results else None
+
+    def find_one_and_update(self, query, update, *args, sort=None, **kwargs):
+        self._record(query, sort, limit=1)
+        return None
+
+    def update_one(self, query, *args, **kwargs):
+        self._record(query, limit=1)
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+
+    def delete_one(self, query, *args, **kwargs):
+        self._record(query, limit=1)
+        return SimpleNamespace(deleted_count=0)
+
+    def update_many(self, query, *args, **kwargs):
+        self._record(query)
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+
+    def count_documents(self, query, *args, **kwargs):
+        self._record(query)
+        return 0
+
+
+class QueryRecorder:
+    """
+    Stand-in database that records each query instead of running it.
+    results maps a collection to the documents its reads return
+    (nothing by default), so code paths that act on a hit are covered.
+    """
+
+    def __init__(self, results=None):
+        self.queries = []
+        self.results = results or {}
+
+    def __getitem__(self, name):
+        return _Collection(self, name)
+
+    __getattr__ = __getitem__
+
+
+def _sync_revocations_since_start():
+    # The first sync loads every revocation by design; check the
+    # incremental query the workers repeat afterwards
+    token_utils._revocations_checked = 0.0
+    token_utils._revocations_synced_at = datetime.utcnow()
+    token_utils._sync_revocations()
+
+
+def model_calls():
+    """
+    (name, call, canned results) for every query path that is checked.
+    """
+    now = datetime.utcnow()
+    updated = {"path": PATH, "pqc_marker": "m", "integrity_root": "r", "key_version": 1}
+
+    calls = [
+        ("get_user_by_id", lambda: get_user_by_id(ObjectId()), None),
+        ("get_user_by_aadhaar", lambda: get_user_by_aadhaar("123412341234"), None),
+        ("get_user_by_email_or_aadhaar", lambda: get_user_by_email_or_aadhaar("a@x.com"), None),
+        ("identity_taken", lambda: identity_taken("123412341234", "a@x.com"), None),
+        ("get_users_by_document_path", lambda: list(get_users_by_document_path(PATH)), None),
+        ("list users", lambda: list(iter_users(build_user_filter(), limit=50)), None),
+        ("list users by role", lambda: list(iter_users(build_user_filter(role="admin"), limit=50)), None),
+        ("list users next page", lambda: list(iter_users(
+            build_user_filter(role="admin"), after_id=ObjectId(), limit=50
+        )), None),
+        ("list users created range", lambda: list(iter_users(build_user_filter(
+            created_from=now - timedelta(days=7), created_to=now
+        ), limit=50)), None),
+        ("list verified users", lambda: list(iter_users(build_user_filter(doc_status="verified"), limit=50)), None),
+        ("claim verification job", _claim_next_job, None),
+        ("get_job", lambda: get_job(ObjectId()), None),
+        ("get_object", lambda: get_object("abcd"), None),
+        ("add_object_reference", lambda: add_object_reference("abcd"), None),
+        ("release_object_reference", lambda: release_object_reference("abcd"), None),
+        ("get_manifest", lambda: get_manifest("abcd"), None),
+        ("get_manifest_by_path", lambda: get_manifest_by_path(PATH), None),
+        ("acquire_lease", lambda: acquire_lease("plan-check", 30), None),
+        ("rotation claim", lambda: claim_next_object(1), None),
+        ("rotation users by object", lambda: repoint_documents(database.get_db(), "object_id", "abcd", updated), None),
+        ("rotation retired files", purge_retired_files, {
+            "retired_files": [{"_id": ObjectId(), "object_id": "abcd", "path": "/missing/old.pdf", "pqc_marker": None}],
+            "objects": [{"_id": "abcd", **updated}]
+        }),
+        ("sync token revocations", _sync_revocations_since_start, None)
+    ]
+
+    for doc_type in DOCUMENT_TYPES:
+        calls.append((
+            f"pending {doc_type} review",
+            lambda doc_type=doc_type: list(iter_users(
+                build_user_filter(doc_status="pending", doc_type=doc_type), limit=50
+            )),
+            None
+        ))
+
+    return calls
+
+
+def record_queries():
+    """
+    (name, collection, filter, sort, limit) captured from model_calls().
+    """
+    queries = []
+    real_db = database.db
+
+    try:
+        for name, call, results in model_calls():
+            recorder = QueryRecorder(results)
+            database.db = recorder
+            call()
+
+            for i, query in enumerate(recorder.queries):
+                label = name if len(recorder.queries) == 1 else f"{name} #{i + 1}"
+                queries.append((label, query["collection"], query["filter"], query["sort"], query["limit"]))
+    finally:
+        database.db = real_db
+
+    return queries
+
+
+def plan_stages(plan):
+    yield plan["stage"]
+
+    if "inputStage" in plan:
+        yield from plan_stages(plan["inputStage"])
+    for child in plan.get("inputStages", []):
+        yield from plan_stages(child)
+
+
+def explain(db, collection, query, sort, limit):
+    """
+    (plan stages, documents examined, documents returned)
+    """
+    command = {"find": collection, "filter": query}
+    if sort:
+        command["sort"] = dict(sort)
+    if limit:
+        command["limit"] = limit
+
+    result = db.command("explain", command, verbosity="executionStats")
+    winning = result["queryPlanner"]["winningPlan"]
+    stats = result["executionStats"]
+
+    # Slot-based engine wraps the classic plan tree
+    stages = list(plan_stages(winning.get("queryPlan", winning)))
+    return stages, stats["totalDocsExamined"], stats["nReturned"]
+
+
+def seed(db):
+    """
+    Filler that none of the checked queries select, so a plan that walks
+    a whole collection shows up as examined-but-not-returned documents.
+    """
+    long_ago = datetime(2020, 1, 1)
+
+    db.users.insert_many([
+        {
+            "full_name": f"Filler {i}",
+            "email": f"filler{i}@plan.check",
+            "aadhaar": f"{i:012d}",
+            "role": "user",
+            "created_at": long_ago,
+            "documents": {
+                t: {
+                    "uploaded": True,
+                    "verified": False,
+                    "rejected": True,
+                    "path": f"/filler/{i}/{t}",
+                    "object_id": f"filler-{i}-{t}"
+                }
+                for t in DOCUMENT_TYPES
+            }
+        }
+        for i in range(FILLER_DOCUMENTS)
+    ])
+    db.verification_jobs.insert_many([
+        {"status": "done", "created_at": long_ago, "path": f"/filler/{i}"}
+        for i in range(FILLER_DOCUMENTS)
+    ])
+    db.objects.insert_many([
+        {"_id": f"filler-{i}", "format": "chunked", "key_version": 1, "path": f"/filler/{i}"}
+        for i in range(FILLER_DOCUMENTS)
+    ])
+    db.retired_files.insert_many([
+        {"object_id": f"filler-{i}", "path": f"/filler/{i}", "retired_at": datetime.utcnow() + timedelta(days=1)}
+        for i in range(FILLER_DOCUMENTS)
+    ])
+    db.integrity_manifests.insert_many([
+        {"_id": f"filler-{i}", "path": f"/filler/{i}"}
+        for i in range(FILLER_DOCUMENTS)
+    ])
+    db.revoked_tokens.insert_many([
+        {"_id": f"filler-{i}", "revoked_at": long_ago, "expires_at": datetime.utcnow() + timedelta(days=1)}
+        for i in range(FILLER_DOCUMENTS)
+    ])
+    db.worker_leases.insert_many([
+        {"_id": f"filler-{i}", "owner": None, "expires_at": None, "next_run_at": long_ago}
+        for i in range(FILLER_DOCUMENTS)
+    ])
+
+
+def check(db, report=print):
+    """
+    Seed db, apply the indexes and explain every recorded query.
+    Returns the names of the queries that scan.
+    """
+    queries = record_queries()
+
+    seed(db)
+    ensure_indexes(db)
+
+    failures = []
+    for name, collection, query, sort, limit in queries:
+        stages, examined, returned = explain(db, collection, query, sort, limit)
+        ok = "COLLSCAN" not in stages and examined <= returned + EXAMINED_SLACK
+
+        report(f"{'ok  ' if ok else 'FAIL'} {name:35} {' <- '.join(stages)}  examined {examined}, returned {returned}")
+        if not ok:
+            failures.append(name)
+
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--keep", action="store_true", help="keep the scratch database")
+    args = parser.parse_args()
+
+    client = MongoClient(Config.MONGO_URI)
+    db = client[client.get_default_database().name + SCRATCH_SUFFIX]
+    client.drop_database(db.name)
+
+    try:
+        failures = check(db)
+    finally:
+        if not args.keep:
+            client.drop_database(db.name)
+
+    if failures:
+        print(f"{len(failures)} queries scan their collection:", ", ".join(failures))
+        sys.exit(1)
+
+    print("All queries use a selective index")
+
+
+if __name__ == "__main__":
+    main()
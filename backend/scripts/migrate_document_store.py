@@ -0,0 +1,117 @@
+"""
+Move existing documents from the flat upload folder into the
+content-addressed object store.
+
+Safe to run while the app is serving: each document is copied into the
+store first, then its user record is switched over only if it still
+points at the old file (a concurrent re-upload wins), and the old file
+is deleted last. Re-running skips documents that are already migrated.
+
+Run from the backend folder:
+
+    python -m scripts.migrate_document_store [--dry-run] [--limit N]
+"""
+import argparse
+import os
+
+from config import Config
+from database.db import connect_db, get_db
+from models.integrity_model import delete_manifest
+from models.user_model import DOCUMENT_TYPES, get_users_by_document_path
+from services.document_store import DocumentStore
+
+
+def legacy_documents():
+    db = get_db()
+    projection = {f"documents.{t}": 1 for t in DOCUMENT_TYPES}
+
+    for user in db.users.find({}, projection):
+        for doc_type in DOCUMENT_TYPES:
+            document = user.get("documents", {}).get(doc_type) or {}
+            path = document.get("path")
+
+            if not path or document.get("object_id"):
+                continue
+            if DocumentStore.is_object_path(path):
+                continue
+
+            yield user["_id"], doc_type, document
+
+
+def migrate_document(user_id, doc_type, document):
+    db = get_db()
+    old_path = document["path"]
+
+    if not os.path.exists(old_path):
+        print("Missing file, skipped:", old_path)
+        return "missing"
+
+    stored = DocumentStore.import_file(old_path)
+
+    result = db.users.update_one(
+        {"_id": user_id, f"documents.{doc_type}.path": old_path},
+        {
+            "$set": {
+                f"documents.{doc_type}.path": stored["path"],
+                f"documents.{doc_type}.object_id": stored["object_id"],
+                f"documents.{doc_type}.pqc_marker": stored["pqc_marker"],
+                f"documents.{doc_type}.integrity_root": stored["integrity_root"],
+                f"documents.{doc_type}.key_version": stored["key_version"],
+                f"documents.{doc_type}.content_sha256": stored["content_sha256"],
+                f"documents.{doc_type}.size": stored["size"]
+            }
+        }
+    )
+
+    if not result.modified_count:
+        # The document was replaced while we were copying it
+        DocumentStore.release(stored["object_id"])
+        return "changed"
+
+    # Queued verification jobs read the file by path
+    db.verification_jobs.update_many(
+        {"path": old_path},
+        {"$set": {"path": stored["path"]}}
+    )
+
+    old_marker = document.get("pqc_marker")
+    if old_marker and old_marker != stored["pqc_marker"]:
+        delete_manifest(old_marker)
+
+    if not any(get_users_by_document_path(old_path)):
+        os.remove(old_path)
+
+    return "deduplicated" if stored["deduplicated"] else "migrated"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="only list documents to migrate")
+    parser.add_argument("--limit", type=int, default=0, help="stop after N documents")
+    args = parser.parse_args()
+
+    connect_db(Config.MONGO_URI)
+
+    counts = {}
+
+    for i, (user_id, doc_type, document) in enumerate(legacy_documents()):
+        if args.limit and i >= args.limit:
+            break
+
+        if args.dry_run:
+            print(user_id, doc_type, document["path"])
+            continue
+
+        try:
+            outcome = migrate_document(user_id, doc_type, document)
+        except Exception as e:
+            print("Failed:", user_id, doc_type, str(e))
+            outcome = "failed"
+
+        counts[outcome] = counts.get(outcome, 0) + 1
+
+    print("Migration finished:", counts)
+
+
+if __name__ == "__main__":
+    main()
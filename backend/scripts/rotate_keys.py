@@ -0,0 +1,305 @@
+"""
+Rotate stored documents onto a new master key.
+
+Chunked documents only get their data key re-wrapped (the header changes,
+the encrypted segments are copied as-is); legacy Fernet documents are
+re-encrypted into the chunked format. Each rewritten file gets a new
+object path, so readers holding the old path keep working until the
+switch-over. The old file is retired rather than deleted: an upload that
+deduplicated onto it just before the switch may still record its path,
+so it is only removed KEY_ROTATION_RETIRE_SECONDS later, after any
+remaining references have been moved to the new file.
+
+Work is claimed per object with an expiring lease, so any number of
+worker processes (or machines) can run at once, and an interrupted run
+simply resumes where it stopped. Each process is throttled to its share
+of --bytes-per-second.
+
+Run from the backend folder (documents must already be in the object
+store, see scripts.migrate_document_store):
+
+    python -m scripts.rotate_keys [--target-version V] [--workers N]
+"""
+import argparse
+import hashlib
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from config import Config
+from database.db import connect_db, get_db
+from models.integrity_model import delete_manifest, save_manifest
+from models.user_model import DOCUMENT_TYPES
+from services.document_store import DocumentStore
+from services.encryption_service import (
+    HEADER,
+    TAG_SIZE,
+    ChunkedEncryptor,
+    EncryptionService,
+    chunked_leaf_layout,
+    rewrap_header
+)
+from services.integrity_scrubber import RateLimiter
+from services.keyring import Keyring
+from services.pqc_service import MerkleBuilder
+
+READ_SIZE = 1024 * 1024
+
+
+def pending_filter(target_version):
+    return {
+        "format": {"$in": ["chunked", "fernet"]},
+        "key_version": {"$ne": target_version}
+    }
+
+
+def claim_next_object(target_version):
+    db = get_db()
+    now = datetime.utcnow()
+
+    return db.objects.find_one_and_update(
+        {
+            **pending_filter(target_version),
+            "$or": [
+                {"rotation_lease": None},
+                {"rotation_lease": {"$lt": now}}
+            ]
+        },
+        {"$set": {"rotation_lease": now + timedelta(seconds=Config.KEY_ROTATION_LEASE_SECONDS)}}
+    )
+
+
+class _HashingWriter:
+    """
+    Writes to a temp file while computing the PQC marker and Merkle leaves.
+    """
+
+    def __init__(self, tmp, first_leaf_size, leaf_size):
+        self.tmp = tmp
+        self.marker = hashlib.sha512()
+        self.merkle = MerkleBuilder(first_leaf_size, leaf_size)
+
+    def write(self, data):
+        self.marker.update(data)
+        self.merkle.update(data)
+        self.tmp.write(data)
+
+
+def _rewrite(src, tmp, obj, target_version, throttle):
+    if obj["format"] == "chunked":
+        header = rewrap_header(src.read(HEADER.size), target_version)
+        writer = _HashingWriter(tmp, *chunked_leaf_layout(header))
+        writer.write(header)
+
+        while True:
+            throttle(READ_SIZE)
+            data = src.read(READ_SIZE)
+            if not data:
+                break
+            writer.write(data)
+
+    else:
+        encryptor = ChunkedEncryptor(key_version=target_version)
+        writer = _HashingWriter(tmp, HEADER.size, encryptor.segment_size + TAG_SIZE)
+
+        # Legacy Fernet files decrypt in one piece
+        throttle(os.fstat(src.fileno()).st_size)
+        for chunk in EncryptionService.decrypt_stream(src):
+            writer.write(encryptor.update(chunk))
+        writer.write(encryptor.finalize())
+
+    return writer
+
+
+def rotate_object(obj, target_version, throttle):
+    db = get_db()
+    old_path = obj["path"]
+    new_path = DocumentStore.object_path(obj["_id"], os.path.splitext(old_path)[1])
+    os.makedirs(os.path.dirname(new_path), exist_ok=True)
+
+    tmp = tempfile.NamedTemporaryFile(dir=os.path.dirname(new_path), prefix=".upload-", delete=False)
+
+    try:
+        with open(old_path, "rb") as src:
+            writer = _rewrite(src, tmp, obj, target_version, throttle)
+
+        tmp.flush()
+        os.fsync(tmp.fileno())
+        tmp.close()
+        os.replace(tmp.name, new_path)
+    except BaseException:
+        tmp.close()
+        if os.path.exists(tmp.name):
+            os.remove(tmp.name)
+        raise
+
+    pqc_marker = writer.marker.hexdigest()
+    manifest = writer.merkle.finalize()
+    save_manifest(pqc_marker, new_path, manifest)
+
+    updated = {
+        "path": new_path,
+        "pqc_marker": pqc_marker,
+        "integrity_root": manifest["root"],
+        "key_version": target_version
+    }
+
+    result = db.objects.update_one(
+        {"_id": obj["_id"], "path": old_path},
+        {"$set": {**updated, "format": "chunked"}, "$unset": {"rotation_lease": ""}}
+    )
+
+    if not result.matched_count:
+        # Released (or rotated by someone else) while we were copying
+        delete_manifest(pqc_marker)
+        os.remove(new_path)
+        return False
+
+    repoint_documents(db, "object_id", obj["_id"], updated)
+    db.verification_jobs.update_many({"path": old_path}, {"$set": {"path": new_path}})
+
+    db.retired_files.insert_one({
+        "object_id": obj["_id"],
+        "path": old_path,
+        "pqc_marker": obj.get("pqc_marker"),
+        "retired_at": datetime.utcnow()
+    })
+
+    return True
+
+
+def repoint_documents(db, field, value, updated):
+    """
+    Move every user document whose <field> equals value to the rotated
+    file described by updated.
+    """
+    for doc_type in DOCUMENT_TYPES:
+        db.users.update_many(
+            {f"documents.{doc_type}.{field}": value},
+            {"$set": {
+                **{f"documents.{doc_type}.{name}": v for name, v in updated.items()},
+                f"documents.{doc_type}.encryption": "AES-256-GCM"
+            }}
+        )
+
+
+def purge_retired_files():
+    """
+    Delete old files retired more than KEY_ROTATION_RETIRE_SECONDS ago,
+    first moving any user or job still pointing at one to its object's
+    current file. Safe to run from several workers at once.
+    """
+    db = get_db()
+    cutoff = datetime.utcnow() - timedelta(seconds=Config.KEY_ROTATION_RETIRE_SECONDS)
+    purged = 0
+
+    for retired in db.retired_files.find({"retired_at": {"$lte": cutoff}}):
+        old_path = retired["path"]
+        obj = db.objects.find_one({"_id": retired["object_id"]})
+
+        if obj and obj["path"] != old_path:
+            updated = {
+                "path": obj["path"],
+                "pqc_marker": obj["pqc_marker"],
+                "integrity_root": obj.get("integrity_root"),
+                "key_version": obj.get("key_version")
+            }
+            repoint_documents(db, "path", old_path, updated)
+            db.verification_jobs.update_many({"path": old_path}, {"$set": {"path": obj["path"]}})
+
+        if retired.get("pqc_marker"):
+            delete_manifest(retired["pqc_marker"])
+        try:
+            os.remove(old_path)
+        except FileNotFoundError:
+            pass
+
+        db.retired_files.delete_one({"_id": retired["_id"]})
+        purged += 1
+
+    return purged
+
+
+def rotation_worker(worker_index, target_version, bytes_per_second):
+    connect_db(Config.MONGO_URI)
+    limiter = RateLimiter(bytes_per_second)
+    counts = {"rotated": 0, "skipped": 0, "failed": 0}
+
+    while True:
+        purge_retired_files()
+
+        obj = claim_next_object(target_version)
+        if obj is None:
+            return counts
+
+        try:
+            outcome = "rotated" if rotate_object(obj, target_version, limiter.throttle) else "skipped"
+        except Exception as e:
+            # Leave the lease in place so other workers move on; it is
+            # retried once the lease expires (next run)
+            print(f"[worker {worker_index}] failed {obj['_id']}: {e}")
+            outcome = "failed"
+
+        counts[outcome] += 1
+
+        done = sum(counts.values())
+        if done % 100 == 0:
+            print(f"[worker {worker_index}] {done} objects processed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--target-version", type=int, default=None, help="master key version to rotate to (default: active)")
+    parser.add_argument("--workers", type=int, default=Config.KEY_ROTATION_WORKERS)
+    parser.add_argument("--bytes-per-second", type=int, default=Config.KEY_ROTATION_BYTES_PER_SECOND, help="total across all workers")
+    args = parser.parse_args()
+
+    target_version = Keyring.active_version() if args.target_version is None else args.target_version
+    if target_version not in Keyring.master_keys():
+        parser.error(f"Unknown master key version {target_version}")
+
+    connect_db(Config.MONGO_URI)
+    db = get_db()
+
+    print("Objects to rotate:", db.objects.count_documents(pending_filter(target_version)))
+
+    unmigrated = db.users.count_documents({
+        "$or": [
+            {f"documents.{t}.path": {"$ne": None}, f"documents.{t}.object_id": None}
+            for t in DOCUMENT_TYPES
+        ]
+    })
+    if unmigrated:
+        print(f"{unmigrated} users still have documents outside the object store; run scripts.migrate_document_store first")
+
+    per_worker = args.bytes_per_second / args.workers
+    totals = {}
+
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        futures = [
+            pool.submit(rotation_worker, i, target_version, per_worker)
+            for i in range(args.workers)
+        ]
+
+        for future in futures:
+            for outcome, count in future.result().items():
+                totals[outcome] = totals.get(outcome, 0) + count
+
+    print("Key rotation finished:", totals)
+
+    # The last old files are deleted once their retire delay has passed
+    remaining = db.retired_files.count_documents({})
+    if remaining:
+        print(f"Waiting {Config.KEY_ROTATION_RETIRE_SECONDS}s to delete {remaining} retired files")
+        time.sleep(Config.KEY_ROTATION_RETIRE_SECONDS)
+        print("Retired files deleted:", purge_retired_files())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Run the verification dispatcher and integrity scrubber in their own
+process, outside the web workers.
+
+Set VERIFICATION_WORKER_ENABLED=0 and SCRUBBER_ENABLED=0 for the web
+processes, then run one or more of these (the MongoDB leases make sure
+only one of each worker is active at a time):
+
+    python -m scripts.run_workers [--no-verification] [--no-scrubber]
+"""
+import argparse
+import time
+
+from config import Config
+from database.db import connect_db, get_db
+from database.indexes import ensure_indexes
+from services.integrity_scrubber import start_integrity_scrubber
+from services.verification_queue import start_verification_worker
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--no-verification", action="store_true", help="do not run the verification dispatcher")
+    parser.add_argument("--no-scrubber", action="store_true", help="do not run the integrity scrubber")
+    args = parser.parse_args()
+
+    connect_db(Config.MONGO_URI)
+    ensure_indexes(get_db())
+
+    if not args.no_verification:
+        start_verification_worker()
+    if not args.no_scrubber:
+        start_integrity_scrubber()
+
+    while True:
+        time.sleep(60)
+
+
+if __name__ == "__main__":
+    main()
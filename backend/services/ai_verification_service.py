@@ -1,164 +1,469 @@
-import pytesseract
 import cv2
-import re
+import io
+import logging
+import os
 import numpy as np
 import pdfplumber
-from pdf2image import convert_from_path
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from config import Config
+from services.ocr_cache import OCRCache
+from services.ocr_engine import get_ocr_engine
+from services.image_preprocessing import ImagePreprocessingService
+from services.ocr_profiles import OCR_PROFILES, parse_mrz
+from services.document_matcher import DocumentMatcher
+
+logger = logging.getLogger(__name__)
 
 
 class AIVerificationService:
 
+    # Score at which each document type is auto-verified
+    AUTO_VERIFY_SCORES = {
+        "aadhaar": 80,
+        "pan": 75,
+        "driving": 75,
+        "passport": 75,
+        "voter": 75
+    }
+
     # ================= OCR EXTRACTION =================
+    # Documents are handled as in-memory bytes plus their file extension,
+    # so decrypted uploads never have to be written back to disk.
+
     @staticmethod
-    def extract_text(file_path):
-        try:
-            if file_path.lower().endswith(".pdf"):
+    def extract_text(file_path, stop_when=None):
+        with open(file_path, "rb") as f:
+            data = f.read()
 
-                # Try direct text extraction first
-                with pdfplumber.open(file_path) as pdf:
-                    text = ""
-                    for page in pdf.pages:
-                        text += page.extract_text() or ""
+        return AIVerificationService.extract_text_from_bytes(
+            data,
+            os.path.splitext(file_path)[1],
+            stop_when
+        )
 
-                if text.strip():
-                    return text
+    @staticmethod
+    def extract_text_from_bytes(data, file_ext, stop_when=None):
+        """
+        OCR a document. stop_when(page_text) is called with each PDF page
+        as it is read; once it returns True the remaining pages are skipped.
+        """
+        cache_key = OCRCache.make_key(data)
 
-                # If scanned PDF
-                pages = convert_from_path(file_path, dpi=300)
-                image = np.array(pages[0])
+        cached = AIVerificationService._cached_text(cache_key)
+        if cached is not None:
+            return cached
 
-            else:
-                image = cv2.imread(file_path)
+        return AIVerificationService._extract_uncached(data, file_ext, stop_when, cache_key)
 
-            if image is None:
-                return ""
+    @staticmethod
+    def _cached_text(cache_key):
+        try:
+            return OCRCache.get(cache_key)
+        except Exception as e:
+            print("AI OCR Error:", str(e))
+            return None
 
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            gray = cv2.medianBlur(gray, 3)
+    @staticmethod
+    def _extract_uncached(data, file_ext, stop_when, cache_key, gray=None):
+        """
+        Full OCR, reusing gray (the preprocessed card image or first
+        page) when the caller already has it.
+        """
+        try:
+            text, complete = AIVerificationService._run_ocr(data, file_ext, stop_when, gray)
 
-            return pytesseract.image_to_string(gray)
+            # Early-exit results are partial, so only full runs are cached
+            if complete:
+                OCRCache.put(cache_key, text)
+
+            return text
 
         except Exception as e:
             print("AI OCR Error:", str(e))
             return ""
 
+    @staticmethod
+    def _is_pdf(file_ext):
+        return file_ext.lower().lstrip(".") == "pdf"
+
+    @staticmethod
+    def _decode_image(data):
+        return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+    @staticmethod
+    def _run_ocr(data, file_ext, stop_when, gray=None):
+        if AIVerificationService._is_pdf(file_ext):
+
+            # Try direct text extraction first
+            text, complete = AIVerificationService._read_text_layer(data, stop_when)
+
+            if text.strip():
+                return text, complete
+
+            # If scanned PDF
+            return AIVerificationService._ocr_scanned_pdf(data, stop_when, first_page=gray)
+
+        if gray is not None:
+            return get_ocr_engine().image_to_string(gray), True
+
+        image = AIVerificationService._decode_image(data)
+
+        if image is None:
+            return "", True
+
+        return AIVerificationService._ocr_image(image), True
+
+    @staticmethod
+    def _iter_text_layer(pdf):
+        """
+        Lazily yield page text, parsing at most PDF_TEXT_MAX_PAGES pages
+        and dropping each page's layout objects once it has been read.
+        """
+        for page in pdf.pages[:Config.PDF_TEXT_MAX_PAGES]:
+            yield page.extract_text() or ""
+            page.flush_cache()
+
+    @staticmethod
+    def _read_text_layer(data, stop_when):
+        texts = []
+
+        with pdfplumber.open(io.BytesIO(data)) as pdf:
+            page_count = len(pdf.pages)
+
+            for page_text in AIVerificationService._iter_text_layer(pdf):
+                texts.append(page_text)
+
+                if stop_when and page_text.strip() and stop_when(page_text):
+                    break
+
+        return "\n".join(texts), len(texts) == page_count
+
+    @staticmethod
+    def _ocr_image(image):
+        gray, timings = ImagePreprocessingService.preprocess(image)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("OCR preprocessing (ms): %s", {
+                stage: round(ms, 1) for stage, ms in timings.items()
+            })
+
+        return get_ocr_engine().image_to_string(gray)
+
+    @staticmethod
+    def _render_page(pdf, page_index):
+        # pdfium renders in memory but is not thread-safe, so pages are
+        # always rendered from the calling thread
+        return np.array(pdf.pages[page_index].to_image(resolution=300).original)
+
+    @staticmethod
+    def _ocr_scanned_pdf(data, stop_when, first_page=None):
+        """
+        Render pages one at a time and OCR them in a bounded pool,
+        consuming results in page order so we can stop once the matcher
+        is satisfied. first_page, if given, is page one already rendered
+        and preprocessed.
+        """
+        texts = []
+
+        with pdfplumber.open(io.BytesIO(data)) as pdf, \
+                ThreadPoolExecutor(max_workers=Config.OCR_PAGE_WORKERS) as pool:
+
+            page_count = len(pdf.pages)
+            page_indexes = iter(range(min(page_count, Config.OCR_MAX_PAGES)))
+
+            def submit(page_index):
+                if page_index == 0 and first_page is not None:
+                    return pool.submit(get_ocr_engine().image_to_string, first_page)
+
+                image = AIVerificationService._render_page(pdf, page_index)
+                return pool.submit(AIVerificationService._ocr_image, image)
+
+            in_flight = deque(
+                submit(n) for n in islice(page_indexes, Config.OCR_PAGE_WORKERS)
+            )
+
+            while in_flight:
+                page_text = in_flight.popleft().result()
+                texts.append(page_text)
+
+                if stop_when and stop_when(page_text):
+                    for future in in_flight:
+                        future.cancel()
+                    break
+
+                for n in islice(page_indexes, 1):
+                    in_flight.append(submit(n))
+
+        return "\n".join(texts), len(texts) == page_count
+
+    # ================= REGION-OF-INTEREST FAST PATH =================
+    @staticmethod
+    def _load_card_image(data, file_ext):
+        """
+        The upload itself, or page one of a scanned PDF. Digital PDFs
+        return None since their text layer is cheaper than any OCR.
+        """
+        if not AIVerificationService._is_pdf(file_ext):
+            return AIVerificationService._decode_image(data)
+
+        with pdfplumber.open(io.BytesIO(data)) as pdf:
+            if not pdf.pages or (pdf.pages[0].extract_text() or "").strip():
+                return None
+
+            return AIVerificationService._render_page(pdf, 0)
+
+    @staticmethod
+    def _load_preprocessed(data, file_ext):
+        """
+        Preprocessed card image for OCR, or None (digital PDF, unreadable).
+        """
+        try:
+            image = AIVerificationService._load_card_image(data, file_ext)
+            if image is None:
+                return None
+
+            gray, _ = ImagePreprocessingService.preprocess(image)
+            return gray
+
+        except Exception as e:
+            print("AI ROI OCR Error:", str(e))
+            return None
+
+    @staticmethod
+    def _ocr_region(gray, region):
+        height, width = gray.shape
+        x0, y0, x1, y1 = region["box"]
+
+        strip = gray[
+            int(y0 * height):int(y1 * height),
+            int(x0 * width):int(x1 * width)
+        ]
+        if strip.size == 0:
+            return ""
+
+        return get_ocr_engine().image_to_string(
+            strip,
+            psm=region["psm"],
+            whitelist=region["whitelist"]
+        )
+
+    @staticmethod
+    def verify_with_profile(data, file_ext, doc_type, user, gray=None):
+        """
+        OCR only the regions listed in the document type's profile.
+        Returns None when the profile does not apply to this file.
+        gray is the preprocessed card image, if already loaded.
+        """
+        profile = OCR_PROFILES.get(doc_type)
+        if not profile:
+            return None
+
+        if gray is None:
+            gray = AIVerificationService._load_preprocessed(data, file_ext)
+        if gray is None:
+            return None
+
+        try:
+            if "mrz" in profile:
+                mrz_text = AIVerificationService._ocr_region(gray, profile["mrz"])
+                mrz = parse_mrz(mrz_text)
+
+                if mrz is None:
+                    return None
+
+                return AIVerificationService.verify_passport_mrz(mrz, user["full_name"])
+
+            text = "\n".join(
+                AIVerificationService._ocr_region(gray, region)
+                for region in profile["regions"]
+            )
+
+            result = AIVerificationService.score_text(text, doc_type, user)
+            if result:
+                result["method"] = "roi"
+
+            return result
+
+        except Exception as e:
+            print("AI ROI OCR Error:", str(e))
+            return None
+
     # ================= AADHAAR =================
     @staticmethod
-    def verify_aadhaar(text, db_name, db_aadhaar):
+    def verify_aadhaar(match, db_name, db_aadhaar):
 
         score = 0
 
-        full_match = re.search(r"\b\d{4}\s?\d{4}\s?\d{4}\b", text)
-        masked_match = re.search(r"X{4}\W?X{4}\W?(\d{4})", text)
-
-        if full_match:
-            extracted = full_match.group().replace(" ", "")
-            if extracted == db_aadhaar:
-                score += 60
+        if db_aadhaar in match.fields["aadhaar"]:
+            score += 60
 
-        elif masked_match:
-            last4 = masked_match.group(1)
-            if last4 == db_aadhaar[-4:]:
-                score += 40
+        elif any(masked[-4:] == db_aadhaar[-4:] for masked in match.fields["aadhaar_masked"]):
+            score += 40
 
-        if db_name.lower() in text.lower():
+        if match.name_matches(db_name):
             score += 40
 
+        threshold = AIVerificationService.AUTO_VERIFY_SCORES["aadhaar"]
+
         return {
             "document_type": "aadhaar",
             "confidence_score": score,
-            "status": "auto_verified" if score >= 80 else "manual_review"
+            "status": "auto_verified" if score >= threshold else "manual_review"
         }
 
     # ================= PAN =================
     @staticmethod
-    def verify_pan(text, db_name):
+    def verify_pan(match, db_name):
 
         score = 0
 
-        pan_match = re.search(r"\b[A-Z]{5}[0-9]{4}[A-Z]\b", text)
-
-        if pan_match:
+        if match.has_id("pan"):
             score += 60
 
-        if db_name.lower() in text.lower():
+        if match.name_matches(db_name):
             score += 40
 
+        threshold = AIVerificationService.AUTO_VERIFY_SCORES["pan"]
+
         return {
             "document_type": "pan",
             "confidence_score": score,
-            "status": "auto_verified" if score >= 75 else "manual_review"
+            "status": "auto_verified" if score >= threshold else "manual_review"
         }
 
     # ================= DRIVING LICENSE =================
     @staticmethod
-    def verify_driving_license(text, db_name):
+    def verify_driving_license(match, db_name):
 
         score = 0
 
-        dl_match = re.search(r"\b[A-Z]{2}\d{2}\s?\d{11}\b", text)
-
-        if dl_match:
+        if match.has_id("driving"):
             score += 60
 
-        if db_name.lower() in text.lower():
+        if match.name_matches(db_name):
             score += 40
 
+        threshold = AIVerificationService.AUTO_VERIFY_SCORES["driving"]
+
         return {
             "document_type": "driving_license",
             "confidence_score": score,
-            "status": "auto_verified" if score >= 75 else "manual_review"
+            "status": "auto_verified" if score >= threshold else "manual_review"
         }
 
     # ================= PASSPORT =================
     @staticmethod
-    def verify_passport(text, db_name):
+    def verify_passport(match, db_name):
 
         score = 0
 
-        passport_match = re.search(r"\b[A-Z][0-9]{7}\b", text)
-
-        if passport_match:
+        if match.has_id("passport"):
             score += 60
 
-        if db_name.lower() in text.lower():
+        if match.name_matches(db_name):
+            score += 40
+
+        threshold = AIVerificationService.AUTO_VERIFY_SCORES["passport"]
+
+        return {
+            "document_type": "passport",
+            "confidence_score": score,
+            "status": "auto_verified" if score >= threshold else "manual_review"
+        }
+
+    # ================= PASSPORT MRZ =================
+    @staticmethod
+    def verify_passport_mrz(mrz, db_name):
+
+        # parse_mrz only returns MRZs whose check digits all validate
+        score = 60
+
+        mrz_names = set(f"{mrz['given_names']} {mrz['surname']}".split())
+        db_names = set(db_name.upper().split())
+
+        # Long names are truncated in the MRZ, so accept either subset
+        if db_names and mrz_names and (db_names <= mrz_names or mrz_names <= db_names):
             score += 40
 
+        threshold = AIVerificationService.AUTO_VERIFY_SCORES["passport"]
+
         return {
             "document_type": "passport",
             "confidence_score": score,
-            "status": "auto_verified" if score >= 75 else "manual_review"
+            "status": "auto_verified" if score >= threshold else "manual_review",
+            "method": "mrz"
         }
 
     # ================= VOTER ID =================
     @staticmethod
-    def verify_voter(text, db_name):
+    def verify_voter(match, db_name):
 
         score = 0
 
-        voter_match = re.search(r"\b[A-Z]{3}[0-9]{7}\b", text)
-
-        if voter_match:
+        if match.has_id("voter"):
             score += 60
 
-        if db_name.lower() in text.lower():
+        if match.name_matches(db_name):
             score += 40
 
+        threshold = AIVerificationService.AUTO_VERIFY_SCORES["voter"]
+
         return {
             "document_type": "voter_id",
             "confidence_score": score,
-            "status": "auto_verified" if score >= 75 else "manual_review"
+            "status": "auto_verified" if score >= threshold else "manual_review"
         }
 
     # ================= MAIN ROUTER =================
     @staticmethod
     def verify_document(file_path, doc_type, user):
+        with open(file_path, "rb") as f:
+            data = f.read()
+
+        return AIVerificationService.verify_document_bytes(
+            data,
+            os.path.splitext(file_path)[1],
+            doc_type,
+            user
+        )
+
+    @staticmethod
+    def verify_document_bytes(data, file_ext, doc_type, user):
+
+        # A cached full OCR result beats any region OCR
+        cache_key = OCRCache.make_key(data)
+        text = AIVerificationService._cached_text(cache_key)
+
+        if text is None:
+            # Decode / render and preprocess once for both passes
+            gray = AIVerificationService._load_preprocessed(data, file_ext)
+
+            fast_result = gray is not None and AIVerificationService.verify_with_profile(
+                data, file_ext, doc_type, user, gray=gray
+            )
 
-        text = AIVerificationService.extract_text(file_path)
+            if fast_result and fast_result["status"] == "auto_verified":
+                return fast_result
 
-        print("========= EXTRACTED TEXT =========")
-        print(text)
-        print("==================================")
+            # Pages are fed to one matcher as they arrive, so extraction can
+            # stop as soon as the required fields have been seen
+            match = DocumentMatcher()
+
+            def auto_verified(page_text):
+                result = AIVerificationService.score_match(match.feed(page_text), doc_type, user)
+                return bool(result) and result["status"] == "auto_verified"
+
+            text = AIVerificationService._extract_uncached(
+                data,
+                file_ext,
+                auto_verified,
+                cache_key,
+                gray
+            )
+
+        logger.debug("Extracted %d characters of %s text", len(text), doc_type)
 
         if not text.strip():
             return {
@@ -167,34 +472,63 @@ class AIVerificationService:
                 "status": "manual_review"
             }
 
+        return AIVerificationService.score_text(text, doc_type, user)
+
+    @staticmethod
+    def score_text(text, doc_type, user):
+        return AIVerificationService.score_match(
+            DocumentMatcher.scan(text),
+            doc_type,
+            user
+        )
+
+    @staticmethod
+    def score_match(match, doc_type, user):
+
+        result = AIVerificationService._score_fields(match, doc_type, user)
+        if result is None:
+            return None
+
+        # Reject uploads whose text is clearly a different document type
+        detected_type = match.detected_type()
+        result["detected_type"] = detected_type
+
+        if detected_type and detected_type != doc_type and not match.has_id(doc_type):
+            result["status"] = "mislabeled"
+
+        return result
+
+    @staticmethod
+    def _score_fields(match, doc_type, user):
+
         if doc_type == "aadhaar":
             return AIVerificationService.verify_aadhaar(
-                text,
+                match,
                 user["full_name"],
                 user["aadhaar"]
             )
 
         elif doc_type == "pan":
             return AIVerificationService.verify_pan(
-                text,
+                match,
                 user["full_name"]
             )
 
         elif doc_type == "driving":
             return AIVerificationService.verify_driving_license(
-                text,
+                match,
                 user["full_name"]
             )
 
         elif doc_type == "passport":
             return AIVerificationService.verify_passport(
-                text,
+                match,
                 user["full_name"]
             )
 
         elif doc_type == "voter":
             return AIVerificationService.verify_voter(
-                text,
+                match,
                 user["full_name"]
             )
 
@@ -0,0 +1,109 @@
+import difflib
+import re
+
+# ID number formats per document type (case-sensitive, OCR output is upper)
+ID_PATTERNS = {
+    "aadhaar": r"\b\d{4}\s?\d{4}\s?\d{4}\b",
+    "aadhaar_masked": r"X{4}\W?X{4}\W?\d{4}",
+    "driving": r"\b[A-Z]{2}\d{2}\s?\d{11}\b",
+    "voter": r"\b[A-Z]{3}[0-9]{7}\b",
+    "pan": r"\b[A-Z]{5}[0-9]{4}[A-Z]\b",
+    "passport": r"\b[A-Z][0-9]{7}\b"
+}
+
+# Printed headings that identify the issuing document
+KEYWORDS = {
+    "aadhaar": r"aadhaa?r|uidai|unique\s+identification",
+    "pan": r"income\s+tax|permanent\s+account",
+    "driving": r"driving\s+licen[cs]e|\bdl\s+no\b|transport",
+    "voter": r"election\s+commission|\bepic\b|elector",
+    "passport": r"passport|republic\s+of\s+india"
+}
+
+DOC_TYPES = list(KEYWORDS)
+
+# Minimum difflib ratio for an OCR token to count as a name token
+NAME_MATCH_CUTOFF = 0.8
+
+
+def normalize_name(text):
+    return " ".join(re.sub(r"[^A-Z]+", " ", text.upper()).split())
+
+
+class DocumentMatcher:
+    """
+    Single-pass matcher for every supported ID type.
+
+    One compiled alternation finds ID numbers and headings for all types
+    in a single scan; name tokens are collected at the same time for
+    fuzzy name matching. Text can be fed in pieces (e.g. page by page).
+    """
+
+    PATTERN = re.compile("|".join(
+        [f"(?P<{kind}>{pattern})" for kind, pattern in ID_PATTERNS.items()]
+        + [f"(?P<kw_{kind}>(?i:{pattern}))" for kind, pattern in KEYWORDS.items()]
+    ))
+
+    def __init__(self):
+        self.fields = {kind: [] for kind in ID_PATTERNS}
+        self.keyword_hits = {doc_type: 0 for doc_type in DOC_TYPES}
+        self.tokens = set()
+
+    @staticmethod
+    def scan(text):
+        return DocumentMatcher().feed(text)
+
+    def feed(self, text):
+        for match in DocumentMatcher.PATTERN.finditer(text):
+            kind = match.lastgroup
+
+            if kind.startswith("kw_"):
+                self.keyword_hits[kind[3:]] += 1
+            else:
+                self.fields[kind].append(re.sub(r"\s", "", match.group()))
+
+        self.tokens.update(normalize_name(text).split())
+
+        return self
+
+    def has_id(self, doc_type):
+        if doc_type == "aadhaar":
+            return bool(self.fields["aadhaar"] or self.fields["aadhaar_masked"])
+        return bool(self.fields[doc_type])
+
+    def name_matches(self, name):
+        """
+        Every token of the name must appear in the text, allowing small
+        OCR errors in each token.
+        """
+        wanted = normalize_name(name).split()
+        if not wanted:
+            return False
+
+        for token in wanted:
+            if token in self.tokens:
+                continue
+            if not difflib.get_close_matches(token, self.tokens, n=1, cutoff=NAME_MATCH_CUTOFF):
+                return False
+
+        return True
+
+    def type_scores(self):
+        return {
+            doc_type: (2 if self.has_id(doc_type) else 0)
+            + min(self.keyword_hits[doc_type], 2)
+            for doc_type in DOC_TYPES
+        }
+
+    def detected_type(self):
+        """
+        Most likely document type, or None when there is no clear winner.
+        """
+        scores = self.type_scores()
+        best = max(scores, key=scores.get)
+        ranked = sorted(scores.values(), reverse=True)
+
+        if ranked[0] < 2 or ranked[0] == ranked[1]:
+            return None
+
+        return best
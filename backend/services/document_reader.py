@@ -0,0 +1,126 @@
+import os
+
+from cryptography.fernet import InvalidToken
+
+from services.encryption_service import HEADER, ChunkedDecryptor, EncryptionService
+from services.pqc_service import IntegrityError, PQCService
+
+
+class DocumentReader:
+    """
+    Random-access plaintext view of a stored document.
+
+    Chunked files decrypt only the segments covering the requested byte
+    range; legacy Fernet files are decrypted once in memory; files stored
+    unencrypted are read as-is when allow_plain is set.
+
+    With a Merkle manifest, every piece of ciphertext is checked against
+    its leaf digest before it is used (IntegrityError on mismatch).
+    """
+
+    def __init__(self, path, allow_plain=False, manifest=None):
+        self._file = open(path, "rb")
+        self._manifest = manifest
+
+        try:
+            if manifest:
+                PQCService.check_manifest(manifest)
+
+            prefix = self._file.read(HEADER.size)
+            file_size = os.fstat(self._file.fileno()).st_size
+            self.format = EncryptionService.detect_format(prefix)
+            self._plaintext = None
+
+            if manifest and self.format != "chunked":
+                # Legacy layouts: verify the whole file once up front
+                self._file.seek(0)
+                self._verify_whole_file()
+                self._file.seek(len(prefix))
+
+            if self.format == "chunked":
+                if manifest:
+                    PQCService.verify_leaf(manifest, 0, prefix)
+                self._decryptor = ChunkedDecryptor(prefix)
+                self._segments = self._decryptor.segment_count(file_size)
+                if manifest and len(manifest["leaves"]) != self._segments + 1:
+                    raise IntegrityError("Chunk count mismatch")
+                self.size = self._decryptor.plaintext_size(file_size)
+
+            elif self.format == "fernet":
+                self._file.seek(0)
+                self._plaintext = EncryptionService.decrypt_bytes(self._file.read())
+                self.size = len(self._plaintext)
+
+            elif allow_plain:
+                self.size = file_size
+
+            else:
+                raise InvalidToken
+
+        except Exception:
+            self._file.close()
+            raise
+
+    def iter_range(self, start=0, stop=None):
+        """
+        Yield plaintext bytes [start, stop) in segment-sized pieces.
+        """
+        stop = self.size if stop is None else min(stop, self.size)
+        if start >= stop:
+            return
+
+        if self.format == "fernet":
+            yield self._plaintext[start:stop]
+
+        elif self.format == "chunked":
+            yield from self._iter_chunked(start, stop)
+
+        else:
+            self._file.seek(start)
+            remaining = stop - start
+            while remaining > 0:
+                data = self._file.read(min(remaining, 64 * 1024))
+                if not data:
+                    return
+                remaining -= len(data)
+                yield data
+
+    def _verify_whole_file(self):
+        manifest = self._manifest
+        size = manifest["first_leaf_size"]
+        index = 0
+
+        while True:
+            data = self._file.read(size)
+            if not data and index > 0:
+                break
+            PQCService.verify_leaf(manifest, index, data)
+            index += 1
+            size = manifest["leaf_size"]
+
+        if index != len(manifest["leaves"]):
+            raise IntegrityError("Chunk count mismatch")
+
+    def _iter_chunked(self, start, stop):
+        decryptor = self._decryptor
+        segment_size = decryptor.segment_size
+        first, last = start // segment_size, (stop - 1) // segment_size
+
+        self._file.seek(decryptor.segment_offset(first))
+
+        for index in range(first, last + 1):
+            sealed = self._file.read(decryptor.sealed_segment_size)
+            if self._manifest:
+                PQCService.verify_leaf(self._manifest, index + 1, sealed)
+
+            plaintext = decryptor.decrypt_segment(
+                index,
+                sealed,
+                last=index == self._segments - 1
+            )
+
+            segment_start = index * segment_size
+            yield plaintext[max(start - segment_start, 0):stop - segment_start]
+
+    def close(self):
+        self._file.close()
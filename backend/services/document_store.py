@@ -0,0 +1,207 @@
+import hashlib
+import hmac
+import os
+import shutil
+import tempfile
+import uuid
+
+from pymongo.errors import DuplicateKeyError
+
+from config import Config
+from models.integrity_model import delete_manifest, save_manifest
+from models.object_model import (
+    add_object_reference,
+    create_object,
+    release_object_reference
+)
+from services.encryption_service import HEADER, EncryptionService
+from services.pqc_service import PQCService
+from services.upload_pipeline import EncryptedUpload, PlainUpload, iter_file_chunks
+
+# Content-addressed document storage.
+#
+#   UPLOAD_FOLDER/objects/ab/cd/<address>-<generation><ext>
+#
+# address = HMAC-SHA256(STORAGE_ADDRESS_KEY, "<format>:<sha256 of plaintext>").
+# It is keyed so file names do not reveal which document a file holds, and
+# the leading hex pairs fan the objects out over STORAGE_FANOUT_LEVELS
+# directory levels. Identical uploads share one stored object; the
+# "objects" collection keeps a reference count per address. The generation
+# suffix keeps a re-created object from ever reusing the file name of one
+# that is still being deleted.
+
+
+class DocumentStore:
+
+    @staticmethod
+    def object_root():
+        return os.path.join(Config.UPLOAD_FOLDER, "objects")
+
+    @staticmethod
+    def object_address(content_sha256, file_format):
+        return hmac.new(
+            Config.STORAGE_ADDRESS_KEY.encode(),
+            f"{file_format}:{content_sha256}".encode(),
+            hashlib.sha256
+        ).hexdigest()
+
+    @staticmethod
+    def object_path(address, ext):
+        fanout = [
+            address[i * 2:i * 2 + 2]
+            for i in range(Config.STORAGE_FANOUT_LEVELS)
+        ]
+        filename = f"{address}-{uuid.uuid4().hex[:8]}{ext.lower()}"
+
+        return os.path.join(DocumentStore.object_root(), *fanout, filename)
+
+    @staticmethod
+    def is_object_path(path):
+        return os.path.abspath(path).startswith(DocumentStore.object_root() + os.sep)
+
+    @staticmethod
+    def put(chunks, ext, encrypt=True):
+        """
+        Store an iterable of plaintext chunks, encrypted (AES-256-GCM chunked
+        container) or as-is. Returns the stored object's details; if the same
+        content is already stored, its existing copy gets another reference.
+        """
+        os.makedirs(Config.UPLOAD_FOLDER, exist_ok=True)
+        sink = (EncryptedUpload if encrypt else PlainUpload)(Config.UPLOAD_FOLDER)
+
+        try:
+            for chunk in chunks:
+                sink.write(chunk)
+            stored = sink.finish()
+        except BaseException:
+            sink.abort()
+            raise
+
+        return DocumentStore._commit(sink.tmp_path, sink.format, ext, stored)
+
+    @staticmethod
+    def import_file(path):
+        """
+        Copy an existing stored file into the object layout byte for byte,
+        so its pqc_marker stays valid. The original is left in place.
+        """
+        with open(path, "rb") as f:
+            prefix = f.read(HEADER.size)
+            file_format = EncryptionService.detect_format(prefix)
+            f.seek(0)
+
+            content_hash = hashlib.sha256()
+            chunks = iter_file_chunks(f) if file_format == "plain" else EncryptionService.decrypt_stream(f)
+            size = 0
+            for chunk in chunks:
+                content_hash.update(chunk)
+                size += len(chunk)
+
+        tmp = tempfile.NamedTemporaryFile(dir=Config.UPLOAD_FOLDER, prefix=".upload-", delete=False)
+        tmp.close()
+
+        try:
+            shutil.copyfile(path, tmp.name)
+
+            stored = {
+                "size": size,
+                "content_sha256": content_hash.hexdigest(),
+                "pqc_marker": None,
+                "integrity": None,
+                "key_version": EncryptionService.key_version(prefix)
+            }
+            if file_format != "plain":
+                stored["pqc_marker"] = PQCService.create_pqc_marker_for_file(tmp.name)
+                stored["integrity"] = PQCService.build_manifest_for_file(tmp.name)
+        except BaseException:
+            os.remove(tmp.name)
+            raise
+
+        return DocumentStore._commit(tmp.name, file_format, os.path.splitext(path)[1], stored)
+
+    @staticmethod
+    def _commit(tmp_path, file_format, ext, stored):
+        address = DocumentStore.object_address(stored["content_sha256"], file_format)
+
+        existing = add_object_reference(address)
+        if existing:
+            os.remove(tmp_path)
+            return DocumentStore._describe(existing, deduplicated=True)
+
+        # The file and its manifest are in place before the object record
+        # exists, so a dedup can never reference a path that is not there yet
+        path = DocumentStore.object_path(address, ext)
+
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+
+            if stored["integrity"]:
+                save_manifest(stored["pqc_marker"], path, stored["integrity"])
+
+            while True:
+                try:
+                    create_object(address, path, file_format, stored)
+                    break
+                except DuplicateKeyError:
+                    # Another upload of the same content won the race
+                    existing = add_object_reference(address)
+                    if existing:
+                        DocumentStore._discard(tmp_path, path, stored)
+                        return DocumentStore._describe(existing, deduplicated=True)
+        except BaseException:
+            DocumentStore._discard(tmp_path, path, stored)
+            raise
+
+        return DocumentStore._describe({
+            "_id": address,
+            "path": path,
+            "size": stored["size"],
+            "content_sha256": stored["content_sha256"],
+            "pqc_marker": stored["pqc_marker"],
+            "integrity_root": (stored["integrity"] or {}).get("root"),
+            "key_version": stored["key_version"]
+        }, deduplicated=False)
+
+    @staticmethod
+    def _discard(tmp_path, path, stored):
+        """
+        Remove an uncommitted upload. No object record points at it yet.
+        """
+        for leftover in (tmp_path, path):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+        if stored["integrity"]:
+            delete_manifest(stored["pqc_marker"])
+
+    @staticmethod
+    def _describe(obj, deduplicated):
+        return {
+            "object_id": obj["_id"],
+            "path": obj["path"],
+            "size": obj["size"],
+            "content_sha256": obj["content_sha256"],
+            "pqc_marker": obj["pqc_marker"],
+            "integrity_root": obj.get("integrity_root"),
+            "key_version": obj.get("key_version"),
+            "deduplicated": deduplicated
+        }
+
+    @staticmethod
+    def release(object_id):
+        """
+        Drop a document's reference; the last one deletes the file.
+        """
+        if not object_id:
+            return False
+
+        obj = release_object_reference(object_id)
+        if obj is None:
+            return False
+
+        if os.path.exists(obj["path"]):
+            os.remove(obj["path"])
+        if obj.get("pqc_marker"):
+            delete_manifest(obj["pqc_marker"])
+
+        return True
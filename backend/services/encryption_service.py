@@ -1,26 +1,268 @@
-from cryptography.fernet import Fernet
-import base64
-import hashlib
+from cryptography.fernet import InvalidToken
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+import os
+import struct
 from config import Config
+from services.keyring import Keyring
+
+# ================= CHUNKED CONTAINER FORMAT =================
+#
+# header : magic(4) version(1) key_version(4) segment_size(4)
+#          file_id(16) wrapped_data_key(60)
+# body   : segments of segment_size plaintext bytes, each sealed with
+#          AES-256-GCM (ciphertext + 16 byte tag)
+#
+# Every file gets a random data key, wrapped with a versioned master key
+# from the keyring (key_version in the header). Segment
+# nonces are file_id[:7] | counter(4) | last-flag(1), so segments cannot be
+# reordered and the stream cannot be truncated without failing auth.
+
+CHUNKED_MAGIC = b"BIDC"
+CHUNKED_VERSION = 1
+TAG_SIZE = 16
+WRAPPED_KEY_SIZE = 12 + 32 + TAG_SIZE
+HEADER = struct.Struct(">4sBII16s60s")
+
+# Fernet tokens are base64 of version byte 0x80 + a 64-bit timestamp
+FERNET_PREFIX = b"gAAAAA"
+
+
+def _segment_nonce(file_id, index, last):
+    return file_id[:7] + index.to_bytes(4, "big") + (b"\x01" if last else b"\x00")
+
+
+def _header_aad(segment_size, file_id):
+    # The key fields are left out so the data key can be re-wrapped
+    # without re-encrypting the segments
+    return CHUNKED_MAGIC + bytes([CHUNKED_VERSION]) + struct.pack(">I", segment_size) + file_id
+
+
+def chunked_leaf_layout(prefix):
+    """
+    Integrity leaf sizes matching a chunked file's layout (the header,
+    then one sealed segment per leaf), or None for other formats.
+    """
+    if len(prefix) < HEADER.size or not prefix.startswith(CHUNKED_MAGIC):
+        return None
+
+    segment_size = HEADER.unpack(prefix[:HEADER.size])[3]
+    return HEADER.size, segment_size + TAG_SIZE
+
+
+def rewrap_header(header, key_version):
+    """
+    Same header with the data key re-wrapped under another master key.
+    The segments do not change.
+    """
+    magic, version, old_version, segment_size, file_id, wrapped_key = HEADER.unpack(header)
+
+    if magic != CHUNKED_MAGIC or version != CHUNKED_VERSION:
+        raise InvalidToken
+
+    data_key = Keyring.unwrap_data_key(old_version, wrapped_key, file_id)
+    key_version, wrapped_key = Keyring.wrap_data_key(data_key, file_id, key_version)
+
+    return HEADER.pack(magic, version, key_version, segment_size, file_id, wrapped_key)
+
+
+class ChunkedEncryptor:
+    """
+    Incremental encryptor: feed plaintext with update(), then finalize().
+    Holds at most one segment of plaintext at a time.
+    """
+
+    def __init__(self, segment_size=None, key_version=None):
+        self.segment_size = segment_size or Config.ENCRYPTION_SEGMENT_SIZE
+        self._file_id = os.urandom(16)
+        self._aad = _header_aad(self.segment_size, self._file_id)
+
+        data_key = AESGCM.generate_key(bit_length=256)
+        self._cipher = AESGCM(data_key)
+
+        self.key_version, wrapped_key = Keyring.wrap_data_key(data_key, self._file_id, key_version)
+
+        self._header = HEADER.pack(
+            CHUNKED_MAGIC,
+            CHUNKED_VERSION,
+            self.key_version,
+            self.segment_size,
+            self._file_id,
+            wrapped_key
+        )
+        self._header_sent = False
+        self._buffer = bytearray()
+        self._index = 0
+
+    def _take_header(self):
+        if self._header_sent:
+            return b""
+        self._header_sent = True
+        return self._header
+
+    def _seal(self, segment, last):
+        nonce = _segment_nonce(self._file_id, self._index, last)
+        self._index += 1
+        return self._cipher.encrypt(nonce, segment, self._aad)
+
+    def update(self, data: bytes) -> bytes:
+        self._buffer += data
+        out = [self._take_header()]
+
+        # Keep the trailing segment back: it may turn out to be the last one
+        while len(self._buffer) > self.segment_size:
+            segment = bytes(self._buffer[:self.segment_size])
+            del self._buffer[:self.segment_size]
+            out.append(self._seal(segment, last=False))
+
+        return b"".join(out)
+
+    def finalize(self) -> bytes:
+        out = self._take_header() + self._seal(bytes(self._buffer), last=True)
+        self._buffer = bytearray()
+        return out
+
+
+class ChunkedDecryptor:
+    """
+    Opens a chunked container header and decrypts individual segments,
+    so callers can read a file sequentially or seek to any segment.
+    """
+
+    def __init__(self, header: bytes):
+        if len(header) != HEADER.size:
+            raise InvalidToken
+
+        magic, version, key_version, segment_size, file_id, wrapped_key = HEADER.unpack(header)
+
+        if magic != CHUNKED_MAGIC or version != CHUNKED_VERSION:
+            raise InvalidToken
+
+        self.key_version = key_version
+        self.segment_size = segment_size
+        self.sealed_segment_size = segment_size + TAG_SIZE
+        self._file_id = file_id
+        self._aad = _header_aad(segment_size, file_id)
+
+        self._cipher = Keyring.data_cipher(key_version, wrapped_key, file_id)
+
+    def segment_offset(self, index):
+        return HEADER.size + index * self.sealed_segment_size
+
+    def segment_count(self, file_size):
+        return -(-(file_size - HEADER.size) // self.sealed_segment_size)
+
+    def plaintext_size(self, file_size):
+        body = file_size - HEADER.size
+        return body - self.segment_count(file_size) * TAG_SIZE
+
+    def decrypt_segment(self, index, sealed, last):
+        try:
+            return self._cipher.decrypt(
+                _segment_nonce(self._file_id, index, last),
+                sealed,
+                self._aad
+            )
+        except InvalidTag:
+            raise InvalidToken
+
 
 class EncryptionService:
 
     @staticmethod
-    def generate_key():
+    def encrypt_bytes(data: bytes) -> bytes:
+        return Keyring.fernet().encrypt(data)
+
+    @staticmethod
+    def decrypt_bytes(token: bytes) -> bytes:
+        if token.startswith(CHUNKED_MAGIC):
+            chunks = EncryptionService._decrypt_chunked_bytes(token)
+            return b"".join(chunks)
+
+        return Keyring.fernet().decrypt(token)
+
+    # ================= STREAMING =================
+    @staticmethod
+    def detect_format(prefix: bytes) -> str:
         """
-        Generate AES-compatible key using SECRET_KEY
+        "chunked", "fernet" or "plain" (stored without encryption)
         """
-        key = hashlib.sha256(Config.SECRET_KEY.encode()).digest()
-        return base64.urlsafe_b64encode(key)
+        if prefix.startswith(CHUNKED_MAGIC):
+            return "chunked"
+        if prefix.startswith(FERNET_PREFIX):
+            return "fernet"
+        return "plain"
 
     @staticmethod
-    def encrypt_bytes(data: bytes) -> bytes:
-        key = EncryptionService.generate_key()
-        f = Fernet(key)
-        return f.encrypt(data)
+    def key_version(prefix: bytes):
+        """
+        Master key version a stored file depends on (None if unencrypted)
+        """
+        file_format = EncryptionService.detect_format(prefix)
+
+        if file_format == "chunked":
+            return HEADER.unpack(prefix[:HEADER.size])[2]
+        if file_format == "fernet":
+            # Legacy Fernet files use the SECRET_KEY-derived key directly
+            return 0
+        return None
 
     @staticmethod
-    def decrypt_bytes(token: bytes) -> bytes:
-        key = EncryptionService.generate_key()
-        f = Fernet(key)
-        return f.decrypt(token)
+    def encrypt_stream(src, dst, read_size=None):
+        """
+        Encrypt file-like src into dst in the chunked format.
+        """
+        encryptor = ChunkedEncryptor()
+        read_size = read_size or encryptor.segment_size
+
+        while True:
+            data = src.read(read_size)
+            if not data:
+                break
+            dst.write(encryptor.update(data))
+
+        dst.write(encryptor.finalize())
+
+    @staticmethod
+    def decrypt_stream(src):
+        """
+        Yield plaintext chunks from a chunked or legacy Fernet file.
+        """
+        prefix = src.read(HEADER.size)
+        file_format = EncryptionService.detect_format(prefix)
+
+        if file_format == "fernet":
+            # Legacy files are a single token and decrypt in one piece
+            yield EncryptionService.decrypt_bytes(prefix + src.read())
+            return
+
+        if file_format != "chunked":
+            raise InvalidToken
+
+        decryptor = ChunkedDecryptor(prefix)
+        index = 0
+        sealed = src.read(decryptor.sealed_segment_size)
+
+        while True:
+            following = src.read(decryptor.sealed_segment_size)
+            yield decryptor.decrypt_segment(index, sealed, last=not following)
+
+            if not following:
+                return
+
+            sealed = following
+            index += 1
+
+    @staticmethod
+    def _decrypt_chunked_bytes(token):
+        decryptor = ChunkedDecryptor(token[:HEADER.size])
+        size = decryptor.sealed_segment_size
+        body = token[HEADER.size:]
+        count = max(1, -(-len(body) // size))
+
+        for index in range(count):
+            yield decryptor.decrypt_segment(
+                index,
+                body[index * size:(index + 1) * size],
+                last=index == count - 1
+            )
@@ -0,0 +1,156 @@
+import time
+
+import cv2
+import numpy as np
+
+from config import Config
+
+# ID-1 card (Aadhaar, PAN, DL, voter ID) is 85.6 x 54 mm
+CARD_LONG_EDGE_INCHES = 3.37
+CARD_ASPECT_RATIO = 85.6 / 54
+# Anything else is treated as an A4 page
+PAGE_LONG_EDGE_INCHES = 11.69
+
+# Longest side of the proxy image used for layout analysis
+ANALYSIS_SIZE = 800
+
+
+class ImagePreprocessingService:
+    """
+    Prepares an image for OCR: crop to the card, normalize resolution to
+    Config.OCR_TARGET_DPI, deskew and binarize. Stages run in the order
+    given by Config.OCR_PREPROCESS_STAGES and are timed individually.
+    """
+
+    @staticmethod
+    def preprocess(image: np.ndarray):
+        """
+        Returns (grayscale image, {stage: milliseconds})
+        """
+        timings = {}
+
+        start = time.perf_counter()
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        timings["grayscale"] = (time.perf_counter() - start) * 1000
+
+        for stage in Config.OCR_PREPROCESS_STAGES:
+            start = time.perf_counter()
+            image = STAGES[stage](image)
+            timings[stage] = (time.perf_counter() - start) * 1000
+
+        return image, timings
+
+    @staticmethod
+    def _analysis_proxy(gray):
+        scale = min(1.0, ANALYSIS_SIZE / max(gray.shape))
+        if scale == 1.0:
+            return gray, scale
+
+        proxy = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        return proxy, scale
+
+    # ================= STAGES =================
+    @staticmethod
+    def crop_to_card(gray):
+        """
+        Crop to the bounding box of the largest card-like contour.
+        """
+        proxy, scale = ImagePreprocessingService._analysis_proxy(gray)
+
+        edges = cv2.Canny(cv2.GaussianBlur(proxy, (5, 5), 0), 50, 150)
+        edges = cv2.dilate(edges, np.ones((5, 5), np.uint8))
+        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        if not contours:
+            return gray
+
+        largest = max(contours, key=cv2.contourArea)
+        x, y, w, h = cv2.boundingRect(largest)
+
+        # Ignore specks and contours that are already the whole frame
+        if w * h < 0.2 * proxy.size or w * h > 0.95 * proxy.size:
+            return gray
+
+        x0, y0 = int(x / scale), int(y / scale)
+        x1, y1 = int((x + w) / scale), int((y + h) / scale)
+
+        return gray[y0:y1, x0:x1]
+
+    @staticmethod
+    def normalize_resolution(gray):
+        """
+        Resize so the document lands at the target DPI, assuming ID-card
+        dimensions for card-shaped images and A4 otherwise.
+        """
+        height, width = gray.shape
+        long_side, short_side = max(height, width), min(height, width)
+
+        if abs(long_side / short_side - CARD_ASPECT_RATIO) < 0.25:
+            long_edge_inches = CARD_LONG_EDGE_INCHES
+        else:
+            long_edge_inches = PAGE_LONG_EDGE_INCHES
+
+        scale = Config.OCR_TARGET_DPI * long_edge_inches / long_side
+        scale = min(scale, 2.0)
+
+        if abs(scale - 1.0) < 0.05:
+            return gray
+
+        interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_CUBIC
+        return cv2.resize(gray, None, fx=scale, fy=scale, interpolation=interpolation)
+
+    @staticmethod
+    def deskew(gray):
+        """
+        Estimate text skew from the minimum-area rectangle around dark
+        pixels and rotate it away.
+        """
+        proxy, _ = ImagePreprocessingService._analysis_proxy(gray)
+
+        _, ink = cv2.threshold(proxy, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+        points = cv2.findNonZero(ink)
+
+        if points is None or len(points) < 50:
+            return gray
+
+        angle = cv2.minAreaRect(points)[-1]
+        if angle > 45:
+            angle -= 90
+        elif angle < -45:
+            angle += 90
+
+        if abs(angle) < 0.5:
+            return gray
+
+        height, width = gray.shape
+        matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+
+        return cv2.warpAffine(
+            gray,
+            matrix,
+            (width, height),
+            flags=cv2.INTER_LINEAR,
+            borderMode=cv2.BORDER_REPLICATE
+        )
+
+    @staticmethod
+    def binarize(gray):
+        gray = cv2.medianBlur(gray, 3)
+
+        return cv2.adaptiveThreshold(
+            gray,
+            255,
+            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+            cv2.THRESH_BINARY,
+            31,
+            15
+        )
+
+
+STAGES = {
+    "crop": ImagePreprocessingService.crop_to_card,
+    "normalize": ImagePreprocessingService.normalize_resolution,
+    "deskew": ImagePreprocessingService.deskew,
+    "binarize": ImagePreprocessingService.binarize
+}
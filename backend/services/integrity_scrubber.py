@@ -0,0 +1,177 @@
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime
+
+from config import Config
+from database.db import get_db
+from models.integrity_model import get_manifest_by_path
+from models.user_cache import invalidate_user
+from models.user_model import get_users_by_document_path
+from models.worker_lease_model import LeaseKeeper, acquire_lease, release_lease
+from services.pqc_service import IntegrityError, PQCService
+
+# Background job that re-reads every stored document at a bounded I/O rate
+# and flags documents whose bytes no longer match their Merkle manifest
+# (or, for older uploads, their whole-file pqc_marker). Every web process
+# starts the thread, but a scrub only runs in the process that takes the
+# "integrity-scrubber" lease once SCRUB_INTERVAL_SECONDS have passed.
+
+SCRUB_LEASE = "integrity-scrubber"
+
+_scrubber = None
+
+
+class RateLimiter:
+    """
+    Simple pacing limiter: throttle(n) sleeps so that the average
+    rate stays at or below bytes_per_second.
+    """
+
+    def __init__(self, bytes_per_second):
+        self.bytes_per_second = bytes_per_second
+        self._next_time = time.monotonic()
+
+    def throttle(self, n):
+        now = time.monotonic()
+        if self._next_time > now:
+            time.sleep(self._next_time - now)
+        self._next_time = max(self._next_time, now) + n / self.bytes_per_second
+
+
+def _marker_for_file(path, throttle):
+    marker = hashlib.sha512()
+    read_size = 1024 * 1024
+
+    with open(path, "rb") as f:
+        while True:
+            throttle(read_size)
+            data = f.read(read_size)
+            if not data:
+                break
+            marker.update(data)
+
+    return marker.hexdigest()
+
+
+def _flag_documents(path, status):
+    db = get_db()
+    now = datetime.utcnow()
+
+    for user, doc_types in get_users_by_document_path(path):
+        # A clean file that was already clean needs no write
+        if status == "ok":
+            doc_types = [
+                t for t in doc_types
+                if user["documents"][t].get("integrity_status") != "ok"
+            ]
+            if not doc_types:
+                continue
+
+        db.users.update_one(
+            {"_id": user["_id"]},
+            {
+                "$set": {
+                    **{f"documents.{t}.integrity_status": status for t in doc_types},
+                    **{f"documents.{t}.integrity_checked_at": now for t in doc_types}
+                }
+            }
+        )
+        invalidate_user(user["_id"])
+
+
+def check_file(path, throttle):
+    """
+    Returns "ok", "corrupted", or None when there is nothing to check
+    the file against (e.g. unencrypted enrollment files).
+    """
+    manifest = get_manifest_by_path(path)
+
+    if manifest:
+        try:
+            PQCService.check_manifest(manifest)
+            actual = PQCService.build_manifest_for_file(path, throttle)
+            return "ok" if actual["leaves"] == manifest["leaves"] else "corrupted"
+        except IntegrityError:
+            return "corrupted"
+
+    for user, doc_types in get_users_by_document_path(path):
+        stored_marker = user["documents"][doc_types[0]].get("pqc_marker")
+        if stored_marker:
+            return "ok" if _marker_for_file(path, throttle) == stored_marker else "corrupted"
+
+    return None
+
+
+def scrub_once(upload_folder=None, bytes_per_second=None, should_stop=None):
+    upload_folder = upload_folder or Config.UPLOAD_FOLDER
+    limiter = RateLimiter(bytes_per_second or Config.SCRUB_BYTES_PER_SECOND)
+    counts = {"ok": 0, "corrupted": 0, "skipped": 0}
+
+    for root, _, files in os.walk(upload_folder):
+        for name in files:
+            if should_stop and should_stop():
+                counts["stopped"] = True
+                return counts
+
+            # In-flight uploads are still being written
+            if name.startswith(".upload-"):
+                continue
+
+            path = os.path.join(root, name)
+
+            try:
+                status = check_file(path, limiter.throttle)
+            except OSError as e:
+                print("Scrubber read error:", path, str(e))
+                status = "corrupted"
+
+            if status is None:
+                counts["skipped"] += 1
+                continue
+
+            counts[status] += 1
+            _flag_documents(path, status)
+
+            if status == "corrupted":
+                print("Scrubber: integrity check failed for", path)
+
+    return counts
+
+
+def _scrub_if_due():
+    if not acquire_lease(SCRUB_LEASE, Config.WORKER_LEASE_SECONDS, due_only=True):
+        return
+
+    with LeaseKeeper(SCRUB_LEASE, Config.WORKER_LEASE_SECONDS) as lease:
+        try:
+            print("Integrity scrub finished:", scrub_once(should_stop=lease.lost.is_set))
+        finally:
+            # A failed scrub also waits a full interval, as before
+            if not lease.lost.is_set():
+                release_lease(SCRUB_LEASE, next_run_in=Config.SCRUB_INTERVAL_SECONDS)
+
+
+def _scrub_forever():
+    while True:
+        try:
+            _scrub_if_due()
+        except Exception as e:
+            print("Integrity scrub error:", str(e))
+
+        time.sleep(Config.SCRUB_POLL_SECONDS)
+
+
+def start_integrity_scrubber():
+    global _scrubber
+
+    if _scrubber is not None:
+        return
+
+    _scrubber = threading.Thread(
+        target=_scrub_forever,
+        name="integrity-scrubber",
+        daemon=True
+    )
+    _scrubber.start()
@@ -0,0 +1,118 @@
+import base64
+import functools
+import hashlib
+import os
+import threading
+
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+from config import Config
+
+# Envelope encryption: every document has its own random data key, stored
+# in the document header wrapped (AES-256-GCM) by a versioned master key.
+# Rotating a master key only re-wraps those small data keys.
+#
+# Version 0 is derived from SECRET_KEY with HKDF, so it never equals the
+# legacy Fernet key (the plain SHA-256 of SECRET_KEY); further versions
+# come from Config.ENCRYPTION_MASTER_KEYS.
+# Cipher objects are built once per process and reused.
+
+_master_keys = None
+_master_ciphers = {}
+_fernet = None
+_lock = threading.Lock()
+
+
+class Keyring:
+
+    @staticmethod
+    def master_keys():
+        global _master_keys
+
+        with _lock:
+            if _master_keys is None:
+                keys = {0: HKDF(
+                    algorithm=hashes.SHA256(),
+                    length=32,
+                    salt=None,
+                    info=b"document master key v0"
+                ).derive(Config.SECRET_KEY.encode())}
+
+                for entry in Config.ENCRYPTION_MASTER_KEYS.split(","):
+                    if not entry.strip():
+                        continue
+                    version, _, encoded = entry.strip().partition(":")
+                    key = base64.urlsafe_b64decode(encoded)
+                    if len(key) != 32:
+                        raise ValueError(f"Master key {version} must be 32 bytes")
+                    keys[int(version)] = key
+
+                _master_keys = keys
+
+            return _master_keys
+
+    @staticmethod
+    def active_version():
+        if Config.ENCRYPTION_ACTIVE_KEY_VERSION is not None:
+            return int(Config.ENCRYPTION_ACTIVE_KEY_VERSION)
+        return max(Keyring.master_keys())
+
+    @staticmethod
+    def master_cipher(key_version):
+        cipher = _master_ciphers.get(key_version)
+        if cipher is not None:
+            return cipher
+
+        key = Keyring.master_keys().get(key_version)
+        if key is None:
+            raise InvalidToken
+
+        cipher = AESGCM(key)
+        _master_ciphers[key_version] = cipher
+        return cipher
+
+    @staticmethod
+    def fernet():
+        """
+        Legacy whole-file Fernet cipher (key derived from SECRET_KEY)
+        """
+        global _fernet
+
+        if _fernet is None:
+            key = hashlib.sha256(Config.SECRET_KEY.encode()).digest()
+            _fernet = Fernet(base64.urlsafe_b64encode(key))
+        return _fernet
+
+    @staticmethod
+    def wrap_data_key(data_key, file_id, key_version=None):
+        """
+        Returns (key_version, nonce + wrapped key).
+        """
+        if key_version is None:
+            key_version = Keyring.active_version()
+
+        nonce = os.urandom(12)
+        wrapped = Keyring.master_cipher(key_version).encrypt(nonce, data_key, file_id)
+        return key_version, nonce + wrapped
+
+    @staticmethod
+    def unwrap_data_key(key_version, wrapped_key, file_id):
+        try:
+            return Keyring.master_cipher(key_version).decrypt(
+                wrapped_key[:12], wrapped_key[12:], file_id
+            )
+        except InvalidTag:
+            raise InvalidToken
+
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def data_cipher(key_version, wrapped_key, file_id):
+        """
+        Cached AESGCM for one document, so repeated (range) reads of the
+        same file skip the unwrap.
+        """
+        return AESGCM(Keyring.unwrap_data_key(key_version, wrapped_key, file_id))
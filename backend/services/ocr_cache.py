@@ -0,0 +1,191 @@
+import hashlib
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import InvalidToken
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from config import Config
+from services.keyring import Keyring
+
+
+class OCRCache:
+    """
+    On-disk OCR result cache keyed by document content.
+
+    Backed by SQLite so every verification worker process shares the
+    same entries and hit/miss counters. The text is sealed the same way
+    as stored documents: a random AES-256-GCM key per entry, wrapped by
+    the keyring's active master key.
+    """
+
+    _initialized_path = None
+
+    @staticmethod
+    def _connect():
+        path = Config.OCR_CACHE_PATH
+
+        if OCRCache._initialized_path != path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        conn = sqlite3.connect(path, timeout=10)
+
+        if OCRCache._initialized_path != path:
+            conn.execute("PRAGMA journal_mode=WAL")
+
+            # Caches written before encryption hold plaintext: drop them
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(ocr_cache)")]
+            if "text" in columns:
+                conn.execute("DROP TABLE ocr_cache")
+                conn.commit()
+                conn.execute("VACUUM")
+
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_cache ("
+                "key TEXT PRIMARY KEY, key_version INTEGER NOT NULL, "
+                "wrapped_key BLOB NOT NULL, sealed BLOB NOT NULL, "
+                "size INTEGER NOT NULL, created_at REAL NOT NULL, "
+                "last_access REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ocr_cache_lru "
+                "ON ocr_cache (last_access)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_cache_stats ("
+                "name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+            conn.commit()
+            OCRCache._initialized_path = path
+
+        return conn
+
+    @staticmethod
+    def make_key(data: bytes) -> str:
+        """
+        SHA-256 of the plaintext plus the OCR configuration version
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        return f"{digest}:{Config.OCR_CONFIG_VERSION}"
+
+    @staticmethod
+    def _count(conn, name):
+        conn.execute(
+            "INSERT INTO ocr_cache_stats (name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,)
+        )
+
+    @staticmethod
+    def _seal(key, text):
+        data_key = AESGCM.generate_key(bit_length=256)
+        key_version, wrapped_key = Keyring.wrap_data_key(data_key, key.encode())
+
+        nonce = os.urandom(12)
+        sealed = nonce + AESGCM(data_key).encrypt(nonce, text.encode("utf-8"), key.encode())
+        return key_version, wrapped_key, sealed
+
+    @staticmethod
+    def _open(key, key_version, wrapped_key, sealed):
+        cipher = Keyring.data_cipher(key_version, bytes(wrapped_key), key.encode())
+        return cipher.decrypt(sealed[:12], sealed[12:], key.encode()).decode("utf-8")
+
+    @staticmethod
+    def get(key):
+        now = time.time()
+        text = None
+
+        with closing(OCRCache._connect()) as conn:
+            row = conn.execute(
+                "SELECT key_version, wrapped_key, sealed FROM ocr_cache "
+                "WHERE key = ? AND created_at >= ?",
+                (key, now - Config.OCR_CACHE_TTL_SECONDS)
+            ).fetchone()
+
+            if row is not None:
+                try:
+                    text = OCRCache._open(key, *row)
+                except (InvalidToken, InvalidTag):
+                    # Master key retired since the entry was written
+                    conn.execute("DELETE FROM ocr_cache WHERE key = ?", (key,))
+
+            if text is None:
+                OCRCache._count(conn, "misses")
+            else:
+                conn.execute(
+                    "UPDATE ocr_cache SET last_access = ? WHERE key = ?",
+                    (now, key)
+                )
+                OCRCache._count(conn, "hits")
+
+            conn.commit()
+
+        return text
+
+    @staticmethod
+    def put(key, text):
+        key_version, wrapped_key, sealed = OCRCache._seal(key, text)
+        size = len(sealed)
+
+        if size > Config.OCR_CACHE_MAX_BYTES:
+            return
+
+        now = time.time()
+
+        with closing(OCRCache._connect()) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO ocr_cache "
+                "(key, key_version, wrapped_key, sealed, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, key_version, wrapped_key, sealed, size, now, now)
+            )
+            conn.execute(
+                "DELETE FROM ocr_cache WHERE created_at < ?",
+                (now - Config.OCR_CACHE_TTL_SECONDS,)
+            )
+
+            # Evict least recently used entries over the size budget
+            total = conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM ocr_cache"
+            ).fetchone()[0]
+
+            if total > Config.OCR_CACHE_MAX_BYTES:
+                rows = conn.execute(
+                    "SELECT key, size FROM ocr_cache ORDER BY last_access"
+                )
+                evicted = []
+                for old_key, old_size in rows:
+                    if total <= Config.OCR_CACHE_MAX_BYTES:
+                        break
+                    evicted.append((old_key,))
+                    total -= old_size
+
+                conn.executemany("DELETE FROM ocr_cache WHERE key = ?", evicted)
+
+            conn.commit()
+
+    @staticmethod
+    def stats():
+        with closing(OCRCache._connect()) as conn:
+            counters = dict(conn.execute(
+                "SELECT name, value FROM ocr_cache_stats"
+            ).fetchall())
+            entries, total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ocr_cache"
+            ).fetchone()
+
+        hits = counters.get("hits", 0)
+        misses = counters.get("misses", 0)
+        lookups = hits + misses
+
+        return {
+            "entries": entries,
+            "size_bytes": total,
+            "max_bytes": Config.OCR_CACHE_MAX_BYTES,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0
+        }
@@ -0,0 +1,105 @@
+import queue
+import threading
+
+import numpy as np
+import pytesseract
+
+from config import Config
+
+try:
+    import tesserocr
+except ImportError:  # optional, falls back to the pytesseract CLI wrapper
+    tesserocr = None
+
+
+class PytesseractEngine:
+    """
+    Runs the tesseract binary once per image (fork/exec + temp file).
+    """
+
+    name = "pytesseract"
+
+    def image_to_string(self, image: np.ndarray, psm=3, whitelist=None) -> str:
+        config = f"--psm {psm}"
+        if whitelist:
+            config += f" -c tessedit_char_whitelist={whitelist}"
+
+        return pytesseract.image_to_string(image, config=config)
+
+
+class TesserocrEnginePool:
+    """
+    Pool of warm in-process Tesseract engines.
+
+    Each engine loads its language model once; images are handed over
+    as raw pixel buffers, so no process is spawned and nothing touches
+    disk. Tesseract is not thread-safe per engine, so each call checks
+    one out of the pool for its exclusive use.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, size, lang="eng"):
+        self._engines = queue.Queue()
+
+        for _ in range(size):
+            self._engines.put(tesserocr.PyTessBaseAPI(lang=lang))
+
+    def image_to_string(self, image: np.ndarray, psm=3, whitelist=None) -> str:
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        height, width = image.shape[:2]
+        channels = 1 if image.ndim == 2 else image.shape[2]
+
+        api = self._engines.get()
+        try:
+            api.SetPageSegMode(psm)
+            api.SetVariable("tessedit_char_whitelist", whitelist or "")
+            api.SetImageBytes(
+                image.tobytes(),
+                width,
+                height,
+                channels,
+                width * channels
+            )
+            return api.GetUTF8Text()
+        finally:
+            self._engines.put(api)
+
+    def close(self):
+        while not self._engines.empty():
+            self._engines.get_nowait().End()
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def create_ocr_engine(name):
+    if name == "tesserocr":
+        return TesserocrEnginePool(Config.OCR_PAGE_WORKERS, Config.OCR_LANG)
+
+    return PytesseractEngine()
+
+
+def get_ocr_engine():
+    """
+    Process-wide OCR engine chosen by Config.OCR_ENGINE
+    ("auto", "tesserocr" or "pytesseract").
+    """
+    global _engine
+
+    with _engine_lock:
+        if _engine is not None:
+            return _engine
+
+        name = Config.OCR_ENGINE
+        if name == "auto":
+            name = "tesserocr" if tesserocr is not None else "pytesseract"
+
+        try:
+            _engine = create_ocr_engine(name)
+        except Exception as e:
+            print("OCR engine init failed, using pytesseract:", str(e))
+            _engine = PytesseractEngine()
+
+        return _engine
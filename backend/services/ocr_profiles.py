@@ -0,0 +1,104 @@
+import re
+
+DIGITS = "0123456789"
+UPPERCASE = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+MRZ_CHARSET = UPPERCASE + DIGITS + "<"
+
+# Per document type OCR settings for the region-of-interest fast path.
+# Boxes are (x0, y0, x1, y1) fractions of the preprocessed card image;
+# each region is OCRed on its own with the given page segmentation mode
+# and character whitelist (None = no restriction).
+OCR_PROFILES = {
+    "aadhaar": {
+        "regions": [
+            # name / DOB block to the right of the photo
+            {"box": (0.25, 0.15, 1.0, 0.60), "psm": 6, "whitelist": None},
+            # 12-digit number under the photo
+            {"box": (0.15, 0.65, 0.85, 0.95), "psm": 7, "whitelist": DIGITS}
+        ]
+    },
+    "pan": {
+        "regions": [
+            {"box": (0.0, 0.20, 0.75, 0.55), "psm": 6, "whitelist": None},
+            {"box": (0.0, 0.55, 0.75, 0.80), "psm": 7, "whitelist": UPPERCASE + DIGITS}
+        ]
+    },
+    "driving": {
+        "regions": [
+            {"box": (0.0, 0.10, 1.0, 0.60), "psm": 6, "whitelist": None}
+        ]
+    },
+    "voter": {
+        "regions": [
+            {"box": (0.0, 0.0, 1.0, 0.30), "psm": 6, "whitelist": UPPERCASE + DIGITS},
+            {"box": (0.25, 0.25, 1.0, 0.70), "psm": 6, "whitelist": None}
+        ]
+    },
+    "passport": {
+        # Two-line machine readable zone at the bottom of the data page
+        "mrz": {"box": (0.0, 0.72, 1.0, 1.0), "psm": 6, "whitelist": MRZ_CHARSET}
+    }
+}
+
+
+# ================= MRZ (ICAO 9303 TD3) =================
+
+def mrz_check_digit(field):
+    weights = (7, 3, 1)
+    total = 0
+
+    for i, char in enumerate(field):
+        if char.isdigit():
+            value = int(char)
+        elif char.isalpha():
+            value = ord(char) - ord("A") + 10
+        else:
+            value = 0
+        total += value * weights[i % 3]
+
+    return str(total % 10)
+
+
+def parse_mrz(text):
+    """
+    Find a TD3 passport MRZ in OCR text and validate its check digits.
+    Returns a dict of fields, or None if no valid MRZ is present.
+    """
+    lines = [
+        re.sub(r"\s", "", line).upper()
+        for line in text.splitlines()
+    ]
+    lines = [line for line in lines if len(line) >= 40]
+
+    for first, second in zip(lines, lines[1:]):
+        if not first.startswith("P"):
+            continue
+
+        first, second = first[:44].ljust(44, "<"), second[:44].ljust(44, "<")
+
+        number, number_check = second[0:9], second[9]
+        birth, birth_check = second[13:19], second[19]
+        expiry, expiry_check = second[21:27], second[27]
+        composite = second[0:10] + second[13:20] + second[21:43]
+
+        checks = [
+            (number, number_check),
+            (birth, birth_check),
+            (expiry, expiry_check),
+            (composite, second[43])
+        ]
+        if any(mrz_check_digit(field) != check for field, check in checks):
+            continue
+
+        surname, _, given = first[5:].partition("<<")
+
+        return {
+            "passport_number": number.replace("<", ""),
+            "nationality": second[10:13].replace("<", ""),
+            "surname": surname.replace("<", " ").strip(),
+            "given_names": given.replace("<", " ").strip(),
+            "date_of_birth": birth,
+            "expiry_date": expiry
+        }
+
+    return None
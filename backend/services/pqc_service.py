@@ -1,5 +1,76 @@
 import secrets
 import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from services.encryption_service import chunked_leaf_layout
+
+# Merkle tree over the stored file: leaf = SHA-512(0x00 | chunk),
+# node = SHA-512(0x01 | left | right); an odd node is carried up as-is.
+# For chunked containers the leaves line up with the header and with each
+# sealed AES-GCM segment, so a streamed segment can be checked on its own.
+
+_hash_pool = None
+_hash_pool_lock = threading.Lock()
+
+
+class IntegrityError(Exception):
+    pass
+
+
+def _get_hash_pool():
+    global _hash_pool
+
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            _hash_pool = ThreadPoolExecutor(
+                max_workers=Config.INTEGRITY_HASH_WORKERS,
+                thread_name_prefix="integrity-hash"
+            )
+        return _hash_pool
+
+
+class MerkleBuilder:
+    """
+    Split a byte stream into leaves as it is written and hash the leaves
+    on a thread pool (hashlib releases the GIL on large buffers).
+    """
+
+    def __init__(self, first_leaf_size, leaf_size):
+        self.first_leaf_size = first_leaf_size
+        self.leaf_size = leaf_size
+        self._buffer = bytearray()
+        self._futures = []
+
+    def _next_leaf_size(self):
+        return self.first_leaf_size if not self._futures else self.leaf_size
+
+    def update(self, data):
+        self._buffer += data
+
+        while len(self._buffer) >= self._next_leaf_size():
+            size = self._next_leaf_size()
+            leaf = bytes(self._buffer[:size])
+            del self._buffer[:size]
+            self._futures.append(_get_hash_pool().submit(PQCService.leaf_digest, leaf))
+
+    def finalize(self):
+        if self._buffer or not self._futures:
+            self._futures.append(
+                _get_hash_pool().submit(PQCService.leaf_digest, bytes(self._buffer))
+            )
+            self._buffer = bytearray()
+
+        leaves = [future.result() for future in self._futures]
+
+        return {
+            "algorithm": "sha512-merkle",
+            "first_leaf_size": self.first_leaf_size,
+            "leaf_size": self.leaf_size,
+            "leaves": leaves,
+            "root": PQCService.merkle_root(leaves).hex()
+        }
+
 
 class PQCService:
 
@@ -16,3 +87,84 @@ class PQCService:
         Generate SHA-512 marker for encrypted data
         """
         return hashlib.sha512(data).hexdigest()
+
+    @staticmethod
+    def create_pqc_marker_for_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+        """
+        Same marker as create_pqc_marker, hashed from disk in chunks
+        """
+        marker = hashlib.sha512()
+
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                marker.update(chunk)
+
+        return marker.hexdigest()
+
+    # ================= MERKLE INTEGRITY =================
+    @staticmethod
+    def leaf_digest(data: bytes) -> bytes:
+        return hashlib.sha512(b"\x00" + data).digest()
+
+    @staticmethod
+    def merkle_root(leaves) -> bytes:
+        level = list(leaves)
+
+        while len(level) > 1:
+            paired = []
+            for i in range(0, len(level) - 1, 2):
+                paired.append(hashlib.sha512(b"\x01" + level[i] + level[i + 1]).digest())
+            if len(level) % 2:
+                paired.append(level[-1])
+            level = paired
+
+        return level[0]
+
+    @staticmethod
+    def leaf_layout(prefix: bytes):
+        """
+        (first_leaf_size, leaf_size) for a file starting with prefix
+        """
+        layout = chunked_leaf_layout(prefix)
+        if layout:
+            return layout
+
+        return Config.INTEGRITY_CHUNK_SIZE, Config.INTEGRITY_CHUNK_SIZE
+
+    @staticmethod
+    def build_manifest_for_file(file_path, throttle=None):
+        """
+        Merkle manifest of a stored file. throttle(n) is called before each
+        read of n bytes so background jobs can limit their I/O rate.
+        """
+        with open(file_path, "rb") as f:
+            prefix = f.read(4096)
+            f.seek(0)
+
+            builder = MerkleBuilder(*PQCService.leaf_layout(prefix))
+            read_size = 1024 * 1024
+
+            while True:
+                if throttle:
+                    throttle(read_size)
+                data = f.read(read_size)
+                if not data:
+                    break
+                builder.update(data)
+
+        return builder.finalize()
+
+    @staticmethod
+    def check_manifest(manifest):
+        """
+        The stored leaf list must still hash to the stored root.
+        """
+        if PQCService.merkle_root(manifest["leaves"]).hex() != manifest["root"]:
+            raise IntegrityError("Merkle root mismatch")
+
+    @staticmethod
+    def verify_leaf(manifest, index, data):
+        leaves = manifest["leaves"]
+
+        if index >= len(leaves) or PQCService.leaf_digest(data) != leaves[index]:
+            raise IntegrityError(f"Chunk {index} failed integrity check")
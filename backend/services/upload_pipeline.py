@@ -0,0 +1,183 @@
+import hashlib
+import os
+import tempfile
+
+from werkzeug.sansio.multipart import Data, Epilogue, File, MultipartDecoder, NeedData
+
+from config import Config
+from services.encryption_service import HEADER, TAG_SIZE, ChunkedEncryptor
+from services.pqc_service import MerkleBuilder
+
+READ_SIZE = 64 * 1024
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class UploadFieldMissing(Exception):
+    pass
+
+
+def open_multipart_file(stream, boundary, field_name):
+    """
+    Parse a multipart body straight off the request stream.
+
+    Returns (filename, chunks) for the first file part named field_name;
+    chunks is a generator yielding that part's bytes as they arrive.
+    Nothing is spooled to memory or disk by the parser.
+    """
+    decoder = MultipartDecoder(boundary.encode(), max_parts=Config.MAX_UPLOAD_PARTS)
+
+    def events():
+        while True:
+            event = decoder.next_event()
+
+            if isinstance(event, NeedData):
+                decoder.receive_data(stream.read(READ_SIZE) or None)
+            elif isinstance(event, Epilogue):
+                return
+            else:
+                yield event
+
+    parts = events()
+
+    for event in parts:
+        if isinstance(event, File) and event.name == field_name:
+            break
+    else:
+        raise UploadFieldMissing(field_name)
+
+    def chunks():
+        for part_event in parts:
+            if not isinstance(part_event, Data):
+                return
+            if part_event.data:
+                yield part_event.data
+            if not part_event.more_data:
+                return
+
+    return event.filename, chunks()
+
+
+class EncryptedUpload:
+    """
+    Single-pass sink for an uploaded document.
+
+    Each plaintext chunk is hashed (SHA-256, the OCR cache / content key)
+    and encrypted; the ciphertext is hashed (SHA-512 PQC marker, plus
+    Merkle leaves on a thread pool) and written to a temp file in the
+    upload folder. The document store renames it into place once the
+    content hash is known, so plaintext never reaches the disk and a
+    failed upload never leaves a partial file.
+    """
+
+    format = "chunked"
+
+    def __init__(self, upload_folder):
+        self.size = 0
+        self._encryptor = ChunkedEncryptor()
+        self._content_hash = hashlib.sha256()
+        self._marker_hash = hashlib.sha512()
+        self._merkle = MerkleBuilder(
+            HEADER.size,
+            self._encryptor.segment_size + TAG_SIZE
+        )
+        self._tmp = tempfile.NamedTemporaryFile(
+            dir=upload_folder,
+            prefix=".upload-",
+            delete=False
+        )
+        self.tmp_path = self._tmp.name
+
+    def _write_encrypted(self, ciphertext):
+        self._marker_hash.update(ciphertext)
+        self._merkle.update(ciphertext)
+        self._tmp.write(ciphertext)
+
+    def write(self, chunk):
+        self.size += len(chunk)
+        if self.size > Config.MAX_UPLOAD_BYTES:
+            raise UploadTooLarge
+
+        self._content_hash.update(chunk)
+        self._write_encrypted(self._encryptor.update(chunk))
+
+    def finish(self):
+        """
+        Flush the temp file to disk and return what was stored.
+        """
+        self._write_encrypted(self._encryptor.finalize())
+        _close_durably(self._tmp)
+
+        return {
+            "size": self.size,
+            "content_sha256": self._content_hash.hexdigest(),
+            "pqc_marker": self._marker_hash.hexdigest(),
+            "integrity": self._merkle.finalize(),
+            "key_version": self._encryptor.key_version
+        }
+
+    def abort(self):
+        _discard(self._tmp)
+
+
+class PlainUpload:
+    """
+    Same interface as EncryptedUpload for files kept unencrypted
+    (enrollment ID files).
+    """
+
+    format = "plain"
+
+    def __init__(self, upload_folder):
+        self.size = 0
+        self._content_hash = hashlib.sha256()
+        self._tmp = tempfile.NamedTemporaryFile(
+            dir=upload_folder,
+            prefix=".upload-",
+            delete=False
+        )
+        self.tmp_path = self._tmp.name
+
+    def write(self, chunk):
+        self.size += len(chunk)
+        if self.size > Config.MAX_UPLOAD_BYTES:
+            raise UploadTooLarge
+
+        self._content_hash.update(chunk)
+        self._tmp.write(chunk)
+
+    def finish(self):
+        _close_durably(self._tmp)
+
+        return {
+            "size": self.size,
+            "content_sha256": self._content_hash.hexdigest(),
+            "pqc_marker": None,
+            "integrity": None,
+            "key_version": None
+        }
+
+    def abort(self):
+        _discard(self._tmp)
+
+
+def _close_durably(tmp):
+    tmp.flush()
+    os.fsync(tmp.fileno())
+    tmp.close()
+
+
+def _discard(tmp):
+    tmp.close()
+    if os.path.exists(tmp.name):
+        os.remove(tmp.name)
+
+
+def iter_file_chunks(file, read_size=READ_SIZE):
+    while True:
+        data = file.read(read_size)
+        if not data:
+            return
+        yield data
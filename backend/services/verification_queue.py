@@ -0,0 +1,324 @@
+import io
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from config import Config
+from database.db import get_db
+from models.user_cache import invalidate_user
+from models.worker_lease_model import acquire_lease
+from services.ai_verification_service import AIVerificationService
+from services.encryption_service import EncryptionService
+
+# Jobs live in MongoDB so the queue survives restarts without a broker.
+# A dispatcher thread claims jobs with a time-limited lease and hands them
+# to a bounded process pool; a job whose lease expires (worker crashed,
+# server restarted) is simply claimed again. Only the process holding the
+# "verification-dispatcher" lease dispatches, so a deployment with several
+# web workers runs a single process pool. The lease is renewed while the
+# dispatcher waits for a free slot and checked again before every claim;
+# a process that loses it shuts its pool down once running jobs finish.
+
+DISPATCH_LEASE = "verification-dispatcher"
+
+_executor = None
+_dispatcher = None
+_slots = None
+_lease_renewed_at = 0.0
+_dispatching = False
+_executor_lock = threading.Lock()
+
+
+def pending_verification(doc_type, job_id):
+    return {
+        "document_type": doc_type,
+        "confidence_score": 0,
+        "status": "pending",
+        "job_id": str(job_id)
+    }
+
+
+def enqueue_verification(job_id, user_id, doc_type, path):
+    """
+    Queue AI verification for an uploaded document.
+    """
+    db = get_db()
+
+    db.verification_jobs.insert_one({
+        "_id": job_id,
+        "user_id": ObjectId(user_id),
+        "doc_type": doc_type,
+        "path": path,
+        "status": "pending",
+        "attempts": 0,
+        "result": None,
+        "error": None,
+        "created_at": datetime.utcnow(),
+        "started_at": None,
+        "finished_at": None,
+        "lease_expires_at": None
+    })
+
+
+def get_job(job_id):
+    db = get_db()
+    return db.verification_jobs.find_one({"_id": ObjectId(job_id)})
+
+
+# ================= WORKER PROCESS =================
+
+def run_verification_job(path, doc_type, user):
+    """
+    Runs inside a pool process: decrypt the stored file and score it.
+    """
+    with open(path, "rb") as src:
+        is_plain = EncryptionService.detect_format(src.read(16)) == "plain"
+        src.seek(0)
+
+        # Decrypt into memory only; plaintext never goes back to disk
+        if is_plain:
+            data = src.read()  # enrollment files are stored unencrypted
+        else:
+            buffer = io.BytesIO()
+            for chunk in EncryptionService.decrypt_stream(src):
+                buffer.write(chunk)
+            data = buffer.getvalue()
+
+    return AIVerificationService.verify_document_bytes(
+        data,
+        os.path.splitext(path)[1],
+        doc_type,
+        user
+    )
+
+
+# ================= DISPATCHER =================
+
+def _get_executor():
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=Config.VERIFICATION_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _executor
+
+
+def _reset_executor(cancel_futures=True):
+    global _executor
+
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=cancel_futures)
+        _executor = None
+
+
+def _claim_next_job():
+    db = get_db()
+    now = datetime.utcnow()
+
+    return db.verification_jobs.find_one_and_update(
+        {
+            "$or": [
+                {"status": "pending"},
+                {"status": "running", "lease_expires_at": {"$lt": now}}
+            ]
+        },
+        {
+            "$set": {
+                "status": "running",
+                "started_at": now,
+                "lease_expires_at": now + timedelta(
+                    seconds=Config.VERIFICATION_JOB_TIMEOUT_SECONDS
+                )
+            },
+            "$inc": {"attempts": 1}
+        },
+        sort=[("created_at", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def _write_result(job, status, result, error=None):
+    db = get_db()
+    doc_type = job["doc_type"]
+
+    if result is None:
+        result = {
+            "document_type": doc_type,
+            "confidence_score": 0,
+            "status": "manual_review"
+        }
+
+    result = {**result, "job_id": str(job["_id"])}
+
+    db.verification_jobs.update_one(
+        {"_id": job["_id"]},
+        {
+            "$set": {
+                "status": status,
+                "result": result,
+                "error": error,
+                "finished_at": datetime.utcnow(),
+                "lease_expires_at": None
+            }
+        }
+    )
+
+    update = {f"documents.{doc_type}.ai_verification": result}
+
+    # Text that is clearly another document type is rejected outright
+    if result["status"] == "mislabeled":
+        update[f"documents.{doc_type}.rejected"] = True
+
+    # Only overwrite the document if it has not been re-uploaded since
+    db.users.update_one(
+        {
+            "_id": job["user_id"],
+            f"documents.{doc_type}.ai_verification.job_id": str(job["_id"])
+        },
+        {"$set": update}
+    )
+    invalidate_user(job["user_id"])
+
+
+def _fail_job(job, error):
+    db = get_db()
+
+    if job["attempts"] < Config.VERIFICATION_MAX_ATTEMPTS:
+        db.verification_jobs.update_one(
+            {"_id": job["_id"]},
+            {
+                "$set": {
+                    "status": "pending",
+                    "error": error,
+                    "lease_expires_at": None
+                }
+            }
+        )
+        return
+
+    _write_result(job, "failed", None, error)
+
+
+def _on_job_done(job, future):
+    try:
+        _write_result(job, "done", future.result())
+    except BrokenProcessPool as e:
+        print("Verification pool crashed:", str(e))
+        _reset_executor()
+        _fail_job(job, str(e))
+    except Exception as e:
+        print("Verification job error:", str(e))
+        _fail_job(job, str(e))
+    finally:
+        _slots.release()
+
+
+def _submit_job(job):
+    db = get_db()
+
+    user = db.users.find_one(
+        {"_id": job["user_id"]},
+        {"full_name": 1, "aadhaar": 1}
+    )
+
+    if not user:
+        _write_result(job, "failed", None, "User not found")
+        _slots.release()
+        return
+
+    future = _get_executor().submit(
+        run_verification_job,
+        job["path"],
+        job["doc_type"],
+        {"full_name": user["full_name"], "aadhaar": user["aadhaar"]}
+    )
+    future.add_done_callback(lambda f: _on_job_done(job, f))
+
+
+def _hold_dispatch_lease():
+    global _lease_renewed_at
+
+    # Renewing every third of the lease is enough to keep it
+    if time.monotonic() - _lease_renewed_at < Config.WORKER_LEASE_SECONDS / 3:
+        return True
+
+    try:
+        held = acquire_lease(DISPATCH_LEASE, Config.WORKER_LEASE_SECONDS)
+    except Exception as e:
+        print("Verification lease error:", str(e))
+        held = False
+
+    _lease_renewed_at = time.monotonic() if held else 0.0
+    return held
+
+
+def _dispatch_forever():
+    global _dispatching
+
+    while True:
+        if not _hold_dispatch_lease():
+            if _dispatching:
+                # Another process dispatches now; let running jobs finish
+                print("Verification dispatcher lease lost, stopping the pool")
+                _reset_executor(cancel_futures=False)
+                _dispatching = False
+
+            time.sleep(Config.WORKER_LEASE_SECONDS / 3)
+            continue
+
+        _dispatching = True
+
+        # Bounded wait, so the lease is renewed while every slot is busy
+        if not _slots.acquire(timeout=Config.WORKER_LEASE_SECONDS / 3):
+            continue
+
+        # The wait may have outlasted the lease
+        if not _hold_dispatch_lease():
+            _slots.release()
+            continue
+
+        try:
+            job = _claim_next_job()
+        except Exception as e:
+            print("Verification queue error:", str(e))
+            job = None
+
+        if job is None:
+            _slots.release()
+            time.sleep(Config.VERIFICATION_POLL_SECONDS)
+            continue
+
+        try:
+            _submit_job(job)
+        except Exception as e:
+            print("Verification submit error:", str(e))
+            _fail_job(job, str(e))
+            _slots.release()
+
+
+def start_verification_worker():
+    global _dispatcher, _slots
+
+    if _dispatcher is not None:
+        return
+
+    _slots = threading.BoundedSemaphore(Config.VERIFICATION_WORKERS)
+    _dispatcher = threading.Thread(
+        target=_dispatch_forever,
+        name="verification-dispatcher",
+        daemon=True
+    )
+    _dispatcher.start()
+
+    print("Verification worker started")
@@ -0,0 +1,32 @@
+from services.bloom_filter import BloomFilter
+
+
+def _fill(capacity, error_rate):
+    bloom = BloomFilter(capacity, error_rate)
+    added = [f"aadhaar:{i:012d}" for i in range(capacity)]
+    for item in added:
+        bloom.add(item)
+    return bloom, added
+
+
+def test_no_false_negatives():
+    bloom, added = _fill(20000, 0.01)
+
+    assert all(item in bloom for item in added)
+    assert bloom.count == len(added)
+
+
+def test_false_positive_rate_near_configured_rate():
+    for error_rate in (0.01, 0.001):
+        bloom, _ = _fill(20000, error_rate)
+        probes = [f"email:user{i}@example.com" for i in range(100000)]
+
+        rate = sum(bloom.might_contain(item) for item in probes) / len(probes)
+
+        assert rate < error_rate * 1.5
+
+
+def test_empty_filter_contains_nothing():
+    bloom = BloomFilter(1000)
+
+    assert not any(bloom.might_contain(f"email:{i}") for i in range(1000))
@@ -0,0 +1,54 @@
+from services.ocr_profiles import mrz_check_digit, parse_mrz
+
+# ICAO 9303 specimen passport
+SPECIMEN = [
+    "P<UTOERIKSSON<<ANNA<MARIA<<<<<<<<<<<<<<<<<<<",
+    "L898902C36UTO7408122F1204159ZE184226B<<<<<10"
+]
+
+
+def test_check_digits_match_specimen():
+    second = SPECIMEN[1]
+
+    assert mrz_check_digit("L898902C3") == "6"
+    assert mrz_check_digit("740812") == "2"
+    assert mrz_check_digit("120415") == "9"
+    assert mrz_check_digit("ZE184226B<<<<<") == "1"
+    assert mrz_check_digit(second[0:10] + second[13:20] + second[21:43]) == "0"
+
+
+def test_filler_counts_as_zero():
+    assert mrz_check_digit("<<<<<<") == "0"
+    assert mrz_check_digit("AB<") == mrz_check_digit("AB0")
+
+
+def test_parse_specimen():
+    fields = parse_mrz("REPUBLIC OF UTOPIA\n" + "\n".join(SPECIMEN))
+
+    assert fields == {
+        "passport_number": "L898902C3",
+        "nationality": "UTO",
+        "surname": "ERIKSSON",
+        "given_names": "ANNA MARIA",
+        "date_of_birth": "740812",
+        "expiry_date": "120415"
+    }
+
+
+def test_parse_tolerates_ocr_spacing():
+    text = "\n".join(line[:20] + " " + line[20:] for line in SPECIMEN)
+
+    assert parse_mrz(text)["passport_number"] == "L898902C3"
+
+
+def test_parse_rejects_bad_check_digit():
+    for position in (9, 19, 27, 43):
+        second = SPECIMEN[1]
+        wrong = str((int(second[position]) + 1) % 10)
+        corrupted = second[:position] + wrong + second[position + 1:]
+
+        assert parse_mrz(SPECIMEN[0] + "\n" + corrupted) is None
+
+
+def test_parse_without_mrz():
+    assert parse_mrz("INCOME TAX DEPARTMENT\nPermanent Account Number\nABCDE1234F") is None
@@ -0,0 +1,24 @@
+import pytest
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+from config import Config
+from scripts.check_query_plans import SCRATCH_SUFFIX, check
+
+
+@pytest.fixture
+def scratch_db():
+    client = MongoClient(Config.MONGO_URI, serverSelectionTimeoutMS=1000)
+    try:
+        client.admin.command("ping")
+    except PyMongoError:
+        pytest.skip(f"no MongoDB server at {Config.MONGO_URI}")
+
+    name = client.get_default_database().name + SCRATCH_SUFFIX + "_test"
+    client.drop_database(name)
+    yield client[name]
+    client.drop_database(name)
+
+
+def test_model_queries_use_selective_indexes(scratch_db):
+    assert check(scratch_db, report=lambda line: None) == []
@@ -1,6 +1,25 @@
 import jwt
+import threading
+import time
+import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from flask import current_app
+from config import Config
+from database.db import get_db
+
+# Verified tokens are remembered (bounded LRU, dropped at expiry) so a
+# polling client pays for HMAC verification once per token rather than
+# once per request. Revoked token ids (jti) are kept in a set that is
+# synced from the revoked_tokens collection every few seconds, so a
+# revocation in one worker reaches the others quickly.
+
+_verified = OrderedDict()
+_revoked = {}
+_revocations_synced_at = None
+_revocations_checked = 0.0
+_lock = threading.Lock()
+
 
 def generate_token(user):
 
@@ -11,9 +30,9 @@ def generate_token(user):
     payload = {
         "user_id": str(user["_id"]),
         "role": user.get("role", "user"),
+        "jti": uuid.uuid4().hex,
         "exp": expiration
     }
-    print("JWT PAYLOAD:", payload)
 
     token = jwt.encode(
         payload,
@@ -24,19 +43,101 @@ def generate_token(user):
     return token
 
 
+def _sync_revocations():
+    """
+    Pull revocations made since the last sync (at most once per
+    TOKEN_REVOCATION_SYNC_SECONDS).
+    """
+    global _revocations_synced_at, _revocations_checked
+
+    now = time.monotonic()
+    if now - _revocations_checked < Config.TOKEN_REVOCATION_SYNC_SECONDS:
+        return
+
+    _revocations_checked = now
+    query = {}
+    if _revocations_synced_at:
+        # Overlap a little to allow for clock differences between workers
+        query["revoked_at"] = {"$gte": _revocations_synced_at - timedelta(minutes=1)}
+
+    try:
+        for entry in get_db().revoked_tokens.find(query, {"exp": 1, "revoked_at": 1}):
+            with _lock:
+                _revoked[entry["_id"]] = entry["exp"]
+            if not _revocations_synced_at or entry["revoked_at"] > _revocations_synced_at:
+                _revocations_synced_at = entry["revoked_at"]
+    except Exception as e:
+        print("Token revocation sync failed:", str(e))
+
+
+def is_revoked(payload):
+    jti = payload.get("jti")
+    return jti is not None and jti in _revoked
+
+
+def revoke_token(payload):
+    """
+    Revoke a token by its jti until it would have expired anyway.
+    """
+    jti = payload.get("jti")
+    if not jti:
+        return
+
+    exp = payload["exp"]
+
+    with _lock:
+        _revoked[jti] = exp
+
+    get_db().revoked_tokens.update_one(
+        {"_id": jti},
+        {
+            "$set": {
+                "exp": exp,
+                "expires_at": datetime.utcfromtimestamp(exp),
+                "revoked_at": datetime.utcnow()
+            }
+        },
+        upsert=True
+    )
+
+
+def _prune(now):
+    # Expired tokens fail verification anyway, so their entries can go
+    for jti in [jti for jti, exp in _revoked.items() if exp <= now]:
+        del _revoked[jti]
+
+
 def verify_token(token):
+    now = time.time()
+    _sync_revocations()
+
+    with _lock:
+        cached = _verified.get(token)
+
+        if cached is not None:
+            if cached["exp"] <= now:
+                del _verified[token]
+                return None
+            _verified.move_to_end(token)
+            return None if is_revoked(cached) else cached
+
     try:
         payload = jwt.decode(
             token,
             current_app.config["JWT_SECRET_KEY"],
             algorithms=["HS256"]
         )
-       
-        return payload   
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
         return None
 
+    with _lock:
+        _verified[token] = payload
+        while len(_verified) > Config.TOKEN_CACHE_MAX_ENTRIES:
+            _verified.popitem(last=False)
 
+        if len(_revoked) > Config.TOKEN_CACHE_MAX_ENTRIES:
+            _prune(now)
 
+    return None if is_revoked(payload) else payload
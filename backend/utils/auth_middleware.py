@@ -1,39 +1,47 @@
 from functools import wraps
-from flask import request, jsonify
+from flask import g, request, jsonify
 from token_utils import verify_token
 
-def token_required(f):
-    @wraps(f)
-    def decorated(*args, **kwargs):
 
+def get_current_user():
+    """
+    Verified token payload for this request. The token is decoded at most
+    once per request, however many auth checks run.
+    """
+    if "auth_payload" not in g:
         auth_header = request.headers.get("Authorization")
+
         if not auth_header or not auth_header.startswith("Bearer "):
-            return jsonify({"message": "Token missing"}), 401
+            g.auth_payload = None
+            g.auth_error = "Token missing"
+        else:
+            g.auth_payload = verify_token(auth_header.split(" ")[1])
+            g.auth_error = None if g.auth_payload else "Invalid or expired token"
 
-        token = auth_header.split(" ")[1]
-        payload = verify_token(token)
+    return g.auth_payload
 
+
+def token_required(f):
+    @wraps(f)
+    def decorated(*args, **kwargs):
+
+        payload = get_current_user()
         if not payload:
-            return jsonify({"message": "Invalid or expired token"}), 401
+            return jsonify({"message": g.auth_error}), 401
 
         return f(payload, *args, **kwargs)
 
     return decorated
-    
+
+
 def role_required(required_role):
     def wrapper(f):
         @wraps(f)
         def decorated(*args, **kwargs):
 
-            auth_header = request.headers.get("Authorization")
-            if not auth_header or not auth_header.startswith("Bearer "):
-                return jsonify({"message": "Token missing"}), 401
-
-            token = auth_header.split(" ")[1]
-            payload = verify_token(token)
-
+            payload = get_current_user()
             if not payload:
-                return jsonify({"message": "Invalid or expired token"}), 401
+                return jsonify({"message": g.auth_error}), 401
 
             if payload.get("role") != required_role:
                 return jsonify({"message": "Access denied"}), 403
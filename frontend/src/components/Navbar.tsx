@@ -37,6 +37,13 @@ const Navbar = () => {
 
   // 🚪 Logout
   const handleLogout = () => {
+    // Revoke the token server-side; the local logout does not wait for it
+    fetch("http://localhost:5000/api/logout", {
+      method: "POST",
+      headers: { Authorization: `Bearer ${localStorage.getItem("token")}` },
+      keepalive: true,
+    }).catch(() => {});
+
     localStorage.removeItem("token");
     window.location.href = "/login"; // force UI refresh
   };
@@ -30,17 +30,22 @@ type UserType = {
 const AdminDashboard = () => {
 
   const [users, setUsers] = useState<UserType[]>([])
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
   const [search, setSearch] = useState("")
   const navigate = useNavigate()
 
   /* ---------------- FETCH USERS ---------------- */
 
-  const fetchUsers = async () => {
+  const fetchUsers = async (cursor: string | null = null) => {
 
     try {
 
+      const url = cursor
+        ? `http://localhost:5000/api/all-users?cursor=${cursor}`
+        : "http://localhost:5000/api/all-users"
+
       const res = await fetch(
-        "http://localhost:5000/api/all-users",
+        url,
         {
           headers:{
             Authorization:`Bearer ${localStorage.getItem("token")}`
@@ -49,13 +54,15 @@ const AdminDashboard = () => {
       )
 
       const data = await res.json()
+      const page = Array.isArray(data) ? data : []
 
-      setUsers(Array.isArray(data) ? data : [])
+      setUsers((prev)=> cursor ? [...prev, ...page] : page)
+      setNextCursor(res.headers.get("X-Next-Cursor"))
 
     } catch (error) {
 
       console.error("Fetch users error:",error)
-      setUsers([])
+      if (!cursor) setUsers([])
 
     }
   }
@@ -240,6 +247,22 @@ const AdminDashboard = () => {
 
           </table>
 
+          {nextCursor && (
+
+            <div className="flex justify-center mt-4">
+
+              <Button
+                size="sm"
+                variant="outline"
+                onClick={()=>fetchUsers(nextCursor)}
+              >
+                Load more
+              </Button>
+
+            </div>
+
+          )}
+
         </CardContent>
 
       </Card>